@@ -135,7 +135,7 @@ class CollateralApp:
             file: The uploaded file object
             
         Returns:
-            Tuple of (sections, cleaned_contents) if successful, None otherwise
+            Dictionary with 'sections' and 'cleaned_contents' if successful, None otherwise
         """
         return self.file_processor.process_file(file)
 
@@ -5,30 +5,11 @@ import openai
 import httpx
 import tempfile
 import logging
-from dotenv import load_dotenv
 from config_manager import get_env_api_key
+from generate_collaterals import get_client, save_response
 
 logger = logging.getLogger(__name__)
 
-def get_env_api_key():
-    """Get the API key directly from .env to validate against"""
-    # Clear any existing OpenAI environment variables to ensure we only use .env
-    if 'OPENAI_API_KEY' in os.environ:
-        del os.environ['OPENAI_API_KEY']
-    if 'OPENAI_KEY' in os.environ:
-        del os.environ['OPENAI_KEY']
-        
-    # Load fresh from .env
-    dotenv_path = Path(__file__).parent / '.env'
-    if not dotenv_path.exists():
-        raise ValueError(f"Expected .env file at: {dotenv_path}")
-        
-    load_dotenv(dotenv_path)
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY not found in .env file")
-    return api_key
-
 def extract_prompt_and_content(content):
     """
     Extracts the main content and prompt from markdown content
@@ -43,17 +24,18 @@ def extract_prompt_and_content(content):
     sections = content.split('# ')
     
     # Find the Prompt section
-    main_content = ''
+    main_parts = []
     prompt = ''
     
     for section in sections:
         if section.startswith('Prompt'):
             # Extract prompt from Prompt section
             prompt = section[len('Prompt'):].strip()
-        else:
-            # Add other sections to main content
-            if section.strip():
-                main_content += '# ' + section if main_content else section
+        elif section.strip():
+            # Collect other sections and join them once at the end
+            main_parts.append(section)
+    
+    main_content = '# '.join(main_parts)
     
     if not prompt:
         raise ValueError("No '# Prompt' section found in the content")
@@ -71,10 +53,7 @@ def generate_chatgpt_response(content, prompt, api_key):
         raise ValueError(str(e))
         
     logger.info(f"collateral_generator.py: Using OpenAI API key ending with: ...{api_key[-4:]}")
-    client = openai.OpenAI(
-        api_key=api_key,
-        http_client=httpx.Client()
-    )
+    client = get_client(api_key)
     
     system_prompt = f"""Your task: {prompt}
 
@@ -142,54 +121,12 @@ def process_and_save_collaterals(content, config):
         raise
 
 def save_to_vault(response, input_file_path, vault_path):
-    """Save the generated collaterals to the Obsidian vault"""
-    # Get the original filename without extension
-    input_filename = Path(input_file_path).stem
-    
-    # Find the next available counter
-    counter = 0
-    while True:
-        # Create the new filename with counter if needed
-        counter_suffix = f" {counter}" if counter > 0 else ""
-        output_filename = f"{input_filename}-collaterals{counter_suffix}.md"
-        output_path = Path(vault_path) / output_filename
-        
-        if not output_path.exists():
-            break
-        counter += 1
+    """Save the generated collaterals to the Obsidian vault
     
-    # Add backlink to the original file
-    backlink = f"Generated from: [[{input_filename}]]\n\n"
+    Notes are written the same way generate_collaterals.py writes them: the
+    next free counter is used and an existing note is never overwritten.
     
-    # Validate and fix response format
-    lines = response.split('\n')
-    fixed_lines = []
-    in_collaterals = False
-    current_section = None
-    
-    for line in lines:
-        # Handle Collaterals header
-        if line.strip() == "# Collaterals":
-            in_collaterals = True
-            fixed_lines.append(line)
-            continue
-            
-        if in_collaterals:
-            # Fix section headers if needed
-            if line.startswith('#'):
-                if not line.startswith('## '):
-                    # Convert any header to level 2
-                    title = line.lstrip('#').strip()
-                    if not title.startswith('Social Media:'):
-                        title = f"Social Media: {title}"
-                    if not any(emoji in title for emoji in ['📱', '📸', '💼', '🐦']):
-                        title = f"📱 {title}"
-                    line = f"## {title}"
-                current_section = line
-            fixed_lines.append(line)
-    
-    # Write the response with the backlink and fixed format
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(backlink + '\n'.join(fixed_lines))
-        
-    return output_path
+    Returns:
+        Path: The saved note
+    """
+    return save_response(response, input_file_path, vault_path)
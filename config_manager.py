@@ -7,15 +7,71 @@ import json
 from pathlib import Path
 import logging
 from ssl import DefaultVerifyPaths
-from typing import Dict, Any, List
-from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, field, fields, MISSING
 from exceptions import ConfigurationError
 import os
+import threading
 import dotenv
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional, fall back to the standard library
+    _json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Locations of the .env and config.json files shipped next to this module
+_MODULE_DIR = Path(__file__).resolve().parent
+_ENV_PATH = _MODULE_DIR / '.env'
+_CONFIG_PATH = _MODULE_DIR / 'config.json'
+
+# Last validated config per set of source files (config.json, and .env where
+# it is merged in), together with the mtime/size of those files it was built
+# from; checked before anything is read
+_STAT_CACHE: Dict[tuple, tuple] = {}
+_CONFIG_LOCK = threading.Lock()
+
+# Validation message templates, only formatted when a check actually fails
+_MSG_MISSING_FIELD = "Missing required field: {}"
+_DETAIL_MISSING_FIELD = "The configuration must include a '{}' value"
+_MSG_INVALID_TYPE = "Invalid type for {}"
+_DETAIL_INVALID_TYPE = "Expected string, got {}"
+_MSG_EMPTY_FIELD = "Empty {}"
+_DETAIL_EMPTY_FIELD = "The {} field cannot be empty"
+
+# Declarative validation tables; Config.from_dict and FontConfig.from_dict
+# walk these instead of spelling out every check
+_REQUIRED_STR_FIELDS = ('header', 'footer', 'background_image_path')
+_POSITIVE_FIELDS = ('width', 'height', 'font_size')
+_FONT_REQUIRED_KEYS = ('paths', 'header_fonts', 'body_fonts')
+_FONT_LIST_KEYS = ('header_fonts', 'body_fonts')
+
+def _existing_files(paths: List[str]) -> set:
+    """Return the subset of paths that point to existing files.
+    
+    Paths are grouped by directory; a directory holding several of them is
+    listed once with os.scandir instead of stat'ing every file separately.
+    """
+    by_dir: Dict[str, List[str]] = {}
+    for path in paths:
+        by_dir.setdefault(os.path.dirname(path), []).append(path)
+    
+    existing = set()
+    for directory, dir_paths in by_dir.items():
+        if len(dir_paths) > 1:
+            try:
+                with os.scandir(directory or '.') as entries:
+                    names = {entry.name for entry in entries if entry.is_file()}
+                existing.update(path for path in dir_paths if os.path.basename(path) in names)
+                continue
+            except OSError:
+                pass
+        existing.update(path for path in dir_paths if os.path.isfile(path))
+    return existing
+
+@dataclass(slots=True, frozen=True)
 class FontConfig:
     """Font configuration settings."""
     
@@ -28,33 +84,40 @@ class FontConfig:
     paths: Dict[str, str]
     """Font paths, keyed by font name."""
     
-    @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'FontConfig':
-        """Create FontConfig from dictionary data."""
+    @staticmethod
+    def validate(data: Any) -> None:
+        """Check the structure of font configuration data without touching the disk.
+
+        Raises:
+            ConfigurationError: If the font section is malformed.
+        """
         if not isinstance(data, dict):
             raise ConfigurationError("Font configuration must be a dictionary")
             
-        required = ['paths', 'header_fonts', 'body_fonts']
-        missing = [key for key in required if key not in data]
+        missing = [key for key in _FONT_REQUIRED_KEYS if key not in data]
         if missing:
             raise ConfigurationError(f"Missing required font configuration keys: {missing}")
             
         # Ensure we have lists for fonts
-        header_fonts = data.get('header_fonts', [])
-        body_fonts = data.get('body_fonts', [])
-        
-        if not isinstance(header_fonts, list) or not isinstance(body_fonts, list):
+        if not all(isinstance(data[key], list) for key in _FONT_LIST_KEYS):
             raise ConfigurationError("Header and body fonts must be lists")
         
-        # Validate paths exist
-        paths = data.get('paths', {})
-        if not isinstance(paths, dict):
+        if not isinstance(data['paths'], dict):
             raise ConfigurationError("Font paths must be a dictionary")
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'FontConfig':
+        """Create FontConfig from dictionary data."""
+        cls.validate(data)
+        header_fonts = data['header_fonts']
+        body_fonts = data['body_fonts']
+        paths = data['paths']
             
         # Filter out non-existent paths
+        existing = _existing_files([path for path in paths.values() if path])
         valid_paths = {}
         for font_name, path in paths.items():
-            if path and os.path.exists(path):
+            if path and path in existing:
                 valid_paths[font_name] = path
             else:
                 logger.warning(f"Font file not found: {path} for {font_name}")
@@ -62,7 +125,7 @@ class FontConfig:
         # If no valid fonts found, use system font
         if not valid_paths:
             fallback_font = "/System/Library/Fonts/Helvetica.ttc"
-            if os.path.exists(fallback_font):
+            if os.path.isfile(fallback_font):
                 valid_paths["System-Fallback"] = fallback_font
                 if not header_fonts:
                     header_fonts = ["System-Fallback"]
@@ -85,14 +148,19 @@ class FontConfig:
         Returns:
             Dict[str, Any]: A dictionary representation of the FontConfig instance.
         """
-        return asdict(self)
+        # Shallow copies are enough here; asdict() would deep-copy every value
+        return {
+            'header_fonts': list(self.header_fonts),
+            'body_fonts': list(self.body_fonts),
+            'paths': dict(self.paths)
+        }
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Config:
     """Application configuration."""
     
-    fonts: FontConfig
-    """Font configuration settings, including paths and font preferences."""
+    _fonts_raw: Dict[str, Any]
+    """Raw font configuration section, validated at load; paths are checked on first access to `fonts`."""
     
     header: str
     """Header text for the application."""
@@ -121,6 +189,30 @@ class Config:
     obsidian_vault_path: str = ""
     """Path to the Obsidian vault where collaterals will be saved."""
 
+    _fonts: Optional[FontConfig] = field(default=None, init=False, repr=False, compare=False)
+    """Validated font configuration, built lazily by the `fonts` property."""
+
+    _view: Dict[str, Any] = field(default_factory=dict, init=False, repr=False, compare=False)
+    """Scalar fields keyed by name, built once for dictionary-style lookups."""
+
+    def __post_init__(self):
+        object.__setattr__(self, '_view', {
+            name: getattr(self, name) for name in _SCALAR_FIELDS
+        })
+
+    @property
+    def fonts(self) -> FontConfig:
+        """Font configuration settings, including paths and font preferences.
+        
+        The font section is validated by `from_dict`; its paths are only
+        checked on disk the first time it is accessed.
+        """
+        fonts = self._fonts
+        if fonts is None:
+            fonts = FontConfig.from_dict(self._fonts_raw)
+            object.__setattr__(self, '_fonts', fonts)
+        return fonts
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Config':
         """
@@ -137,34 +229,29 @@ class Config:
         """
         try:
             # Validate required string fields
-            required_str_fields = ['header', 'footer', 'background_image_path']
-            for field in required_str_fields:
+            for field in _REQUIRED_STR_FIELDS:
                 if field not in data:
                     raise ConfigurationError(
-                        f"Missing required field: {field}",
-                        f"The configuration must include a '{field}' value"
+                        _MSG_MISSING_FIELD.format(field),
+                        _DETAIL_MISSING_FIELD.format(field)
                     )
                 value = data[field]
                 if not isinstance(value, str):
                     raise ConfigurationError(
-                        f"Invalid type for {field}",
-                        f"Expected string, got {type(value)}"
+                        _MSG_INVALID_TYPE.format(field),
+                        _DETAIL_INVALID_TYPE.format(type(value))
                     )
                 if not value.strip():
                     raise ConfigurationError(
-                        f"Empty {field}",
-                        f"The {field} field cannot be empty"
+                        _MSG_EMPTY_FIELD.format(field),
+                        _DETAIL_EMPTY_FIELD.format(field)
                     )
             
-            # Get optional numeric fields with defaults
-            width = data.get('width', cls.width)
-            height = data.get('height', cls.height)
-            font_size = data.get('font_size', cls.font_size)
-            collaterals_header = data.get('collaterals_header', cls.collaterals_header)
-            openai_api_key = data.get('openai_api_key', cls.openai_api_key)
-            obsidian_vault_path = data.get('obsidian_vault_path', cls.obsidian_vault_path)
+            # Get optional fields with defaults
+            values = {name: data.get(name, default) for name, default in _CONFIG_DEFAULTS.items()}
             
             # Validate dimensions and font size
+            width, height, font_size = (values[name] for name in _POSITIVE_FIELDS)
             if width <= 0 or height <= 0:
                 raise ConfigurationError(
                     "Invalid dimensions",
@@ -176,29 +263,20 @@ class Config:
                     f"Font size must be positive (got {font_size})"
                 )
                 
-            # Validate and create font configuration
+            # Font configuration is validated here; font files are checked lazily by the fonts property
             if 'fonts' not in data:
                 raise ConfigurationError(
                     "Missing fonts configuration",
                     "The configuration must include a 'fonts' section"
                 )
-            fonts = FontConfig.from_dict(data['fonts'])
+            FontConfig.validate(data['fonts'])
             
-            return cls(
-                fonts=fonts,
-                header=data['header'],
-                footer=data['footer'],
-                background_image_path=data['background_image_path'],
-                width=width,
-                height=height,
-                font_size=font_size,
-                collaterals_header=collaterals_header,
-                openai_api_key=openai_api_key,
-                obsidian_vault_path=obsidian_vault_path
-            )
+            for field in _REQUIRED_STR_FIELDS:
+                values[field] = data[field]
+            return cls(_fonts_raw=data['fonts'], **values)
+        except ConfigurationError:
+            raise
         except Exception as e:
-            if isinstance(e, ConfigurationError):
-                raise
             raise ConfigurationError(
                 "Failed to create configuration",
                 str(e)
@@ -217,12 +295,9 @@ class Config:
         Raises:
             KeyError: If the field is not present in the configuration.
         """
-        if hasattr(self, key):
-            value = getattr(self, key)
-            if isinstance(value, FontConfig):
-                return value.to_dict()
-            return value
-        raise KeyError(key)
+        if key == 'fonts':
+            return self.fonts.to_dict()
+        return self._view[key]
 
     def __contains__(self, key: str) -> bool:
         """
@@ -234,7 +309,7 @@ class Config:
         Returns:
             bool: True if the key exists in the configuration, False otherwise.
         """
-        return hasattr(self, key)
+        return key == 'fonts' or key in self._view
     
     def get(self, key: str, default: Any = None) -> Any:
         """
@@ -247,10 +322,9 @@ class Config:
         Returns:
             Any: The value of the specified configuration field, or the default.
         """
-        try:
-            return self[key]
-        except KeyError:
-            return default
+        if key == 'fonts':
+            return self.fonts.to_dict()
+        return self._view.get(key, default)
     
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -259,18 +333,7 @@ class Config:
         Returns:
             Dict[str, Any]: A dictionary representation of the Config instance.
         """
-        return {
-            'fonts': self.fonts.to_dict(),
-            'header': self.header,
-            'footer': self.footer,
-            'background_image_path': self.background_image_path,
-            'width': self.width,
-            'height': self.height,
-            'font_size': self.font_size,
-            'collaterals_header': self.collaterals_header,
-            'openai_api_key': self.openai_api_key,
-            'obsidian_vault_path': self.obsidian_vault_path
-        }
+        return {'fonts': self.fonts.to_dict(), **self._view}
     
     def copy(self) -> Dict[str, Any]:
         """
@@ -281,6 +344,11 @@ class Config:
         """
         return self.to_dict()
 
+# Field names and defaults of Config; slotted dataclasses don't keep
+# defaults as class attributes, so they are collected once here
+_SCALAR_FIELDS = tuple(f.name for f in fields(Config) if not f.name.startswith('_'))
+_CONFIG_DEFAULTS = {f.name: f.default for f in fields(Config) if f.init and f.default is not MISSING}
+
 class ConfigManager:
     """Configuration manager for the application."""
     
@@ -290,28 +358,31 @@ class ConfigManager:
         self._config = None
         
     def load_config(self) -> Config:
-        """Load configuration from file."""
+        """Load configuration from file.
+        
+        The app calls this on every Streamlit rerun; the validated config is
+        reused as long as the config file has not changed on disk.
+        """
+        self._config = _load_cached((Path(self.config_path).resolve(),), self._read_config)
+        return self._config
+    
+    def _read_config(self) -> Config:
+        """Read, parse and validate the config file."""
         if not os.path.exists(self.config_path):
             raise ConfigurationError(f"Configuration file not found: {self.config_path}")
             
         try:
-            with open(self.config_path, 'r') as f:
-                config_data = json.load(f)
+            with open(self.config_path, 'rb') as f:
+                config_data = _json_loads(f.read())
             
-            # Validate and expand font paths
+            # Expand font paths; FontConfig.from_dict checks they exist
             if 'fonts' in config_data:
                 font_paths = config_data['fonts'].get('paths', {})
-                expanded_paths = {}
-                for name, path in font_paths.items():
-                    expanded_path = os.path.expanduser(path)
-                    if os.path.exists(expanded_path):
-                        expanded_paths[name] = expanded_path
-                    else:
-                        logger.warning(f"Font file not found: {expanded_path}")
-                config_data['fonts']['paths'] = expanded_paths
+                config_data['fonts']['paths'] = {
+                    name: os.path.expanduser(path) for name, path in font_paths.items()
+                }
             
-            self._config = Config.from_dict(config_data)
-            return self._config
+            return Config.from_dict(config_data)
             
         except json.JSONDecodeError as e:
             raise ConfigurationError(f"Invalid JSON in config file: {e}")
@@ -334,7 +405,7 @@ def get_env_api_key() -> str:
         del os.environ['OPENAI_KEY']
         
     # Load fresh from .env
-    dotenv_path = Path(__file__).parent / '.env'
+    dotenv_path = _ENV_PATH
     if not dotenv_path.exists():
         raise ConfigurationError(
             "Missing .env file",
@@ -361,7 +432,7 @@ def get_obsidian_vault_path() -> str:
         ConfigurationError: If the config file is missing or the vault path is not found
     """
     #Load fresh from config file
-    dotenv_path = Path(__file__).parent / '.env'
+    dotenv_path = _ENV_PATH
     if not dotenv_path.exists():
         raise ConfigurationError(
             "Missing .env file",
@@ -378,17 +449,49 @@ def get_obsidian_vault_path() -> str:
     return vault_path
 
 
+def _stat_key(path: Path) -> tuple:
+    """Return the (mtime_ns, size) pair used to detect file changes."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
 def load_config() -> Config:
     """Load configuration from config.json file.
     
+    The validated config is reused as long as neither config.json nor .env
+    has changed on disk.
+    
     Returns:
         Config: Validated configuration object
         
     Raises:
         ConfigurationError: If config file is missing, invalid, or contains errors
     """
-    config_path = Path(__file__).parent / 'config.json'
+    return _load_cached((_CONFIG_PATH, _ENV_PATH), lambda: _load_config_file(_CONFIG_PATH))
+
+
+def _load_cached(paths: tuple, load) -> Config:
+    """Return load(), or the config it returned last for the same paths if
+    none of the files at paths has changed since."""
+    try:
+        stat_key = tuple(_stat_key(path) for path in paths)
+    except OSError:
+        # Missing files are reported by the full load
+        stat_key = None
     
+    with _CONFIG_LOCK:
+        cached = _STAT_CACHE.get(paths)
+        if stat_key is not None and cached is not None and cached[0] == stat_key:
+            return cached[1]
+        
+        config = load()
+        if stat_key is not None:
+            _STAT_CACHE[paths] = (stat_key, config)
+        return config
+
+
+def _load_config_file(config_path: Path) -> Config:
+    """Read, parse and validate config.json, merging in values from .env."""
     try:
         if not config_path.exists():
             raise ConfigurationError(
@@ -396,15 +499,12 @@ def load_config() -> Config:
                 f"Expected config file at: {config_path}"
             )
             
-        with open(config_path, 'r') as f:
-            data = json.load(f)
+        data = _json_loads(config_path.read_bytes())
         
-        # Add OpenAI API key from .env file only
+        # OpenAI API key and Obsidian vault path come from .env file only
         data['openai_api_key'] = get_env_api_key()
-        
-        # Add Obsidian vault path from .env file only
         data['obsidian_vault_path'] = get_obsidian_vault_path()
-            
+        
         return Config.from_dict(data)
         
     except json.JSONDecodeError as e:
@@ -412,9 +512,9 @@ def load_config() -> Config:
             "Invalid JSON in config file",
             str(e)
         )
+    except ConfigurationError:
+        raise
     except Exception as e:
-        if isinstance(e, ConfigurationError):
-            raise
         raise ConfigurationError(
             "Failed to load configuration",
             str(e)
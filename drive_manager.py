@@ -1,31 +1,41 @@
 """Google Drive integration for managing file uploads and sharing."""
 
 import os
+import hashlib
 import logging
+import threading
 from typing import Optional, Dict, Any
 from datetime import datetime
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# The Google client libraries are slow to import, so they are only imported
+# once Drive is actually used (see authenticate() and upload_file()).
 
-# Set up logging
-logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger(__name__)
 
 # If modifying these scopes, delete the file token.json.
 SCOPES = ['https://www.googleapis.com/auth/drive.file']
 
+# The last Drive service built on each thread, with a fingerprint of the
+# OAuth client and refresh token it was built for, so new DriveManager
+# instances can reuse it instead of rebuilding. Services are not shared
+# between threads because the httplib2 connection behind them isn't thread
+# safe; keying on the refresh token rather than the access token keeps the
+# entry across token refreshes, and each thread holds a single entry.
+_thread_services = threading.local()
+
+# Files below this size go up in a single multipart request; larger ones use
+# a resumable upload with bigger chunks than the 256 KB default
+SIMPLE_UPLOAD_LIMIT = 5 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
 class DriveManager:
     """Handles Google Drive operations including authentication and file uploads."""
     
     def __init__(self):
         """Initialize the Drive manager using environment variables."""
+        load_dotenv()
+        
         self.credentials_path = os.getenv('GOOGLE_CREDENTIALS_PATH')
         if not self.credentials_path or not os.path.exists(self.credentials_path):
             raise ValueError("Google credentials file not found. Set GOOGLE_CREDENTIALS_PATH in .env")
@@ -44,6 +54,11 @@ class DriveManager:
             bool: True if authentication was successful
         """
         try:
+            from google.oauth2.credentials import Credentials
+            from google_auth_oauthlib.flow import InstalledAppFlow
+            from google.auth.transport.requests import Request
+            from googleapiclient.discovery import build
+            
             # Check if we have valid credentials
             if os.path.exists('token.json'):
                 self.credentials = Credentials.from_authorized_user_file('token.json', SCOPES)
@@ -61,8 +76,20 @@ class DriveManager:
                 with open('token.json', 'w') as token:
                     token.write(self.credentials.to_json())
             
-            # Build the service
-            self.service = build('drive', 'v3', credentials=self.credentials)
+            # Build the service, or reuse the one this thread built for the
+            # same client and refresh token
+            identity = f"{self.credentials.client_id}:{self.credentials.refresh_token}"
+            key = hashlib.sha1(identity.encode()).hexdigest()
+            cached = getattr(_thread_services, 'entry', None)
+            if cached is not None and cached[0] == key:
+                service = cached[1]
+            else:
+                # The discovery document ships with the client library,
+                # so there is no need to fetch or cache it
+                service = build('drive', 'v3', credentials=self.credentials,
+                                cache_discovery=False, static_discovery=True)
+                _thread_services.entry = (key, service)
+            self.service = service
             return True
             
         except Exception as e:
@@ -94,11 +121,24 @@ class DriveManager:
                 'parents': [self.folder_id]
             }
             
-            media = MediaFileUpload(
-                file_path,
-                mimetype='image/jpeg',
-                resumable=True
-            )
+            from googleapiclient.http import MediaFileUpload, MediaInMemoryUpload
+            
+            if os.path.getsize(file_path) < SIMPLE_UPLOAD_LIMIT:
+                # Small files are read once and sent from memory
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+                media = MediaInMemoryUpload(
+                    data,
+                    mimetype='image/jpeg',
+                    resumable=False
+                )
+            else:
+                media = MediaFileUpload(
+                    file_path,
+                    mimetype='image/jpeg',
+                    resumable=True,
+                    chunksize=UPLOAD_CHUNK_SIZE
+                )
             
             file = self.service.files().create(
                 body=file_metadata,
@@ -1,53 +1,120 @@
 import subprocess
 import logging
+import time
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Imports every file passed as an argument into Photos, one after another
+# (Photos handles AppleEvents one at a time anyway), and reports one
+# "<index><tab>OK" or "<index><tab>ERROR<tab><message>" line per file.
+# Paths arrive as arguments, so they are never interpolated into the script.
+IMPORT_SCRIPT = '''
+on run argv
+    set report to {}
+    repeat with i from 1 to count of argv
+        set imageFile to POSIX file (item i of argv)
+        try
+            with timeout of 600 seconds
+                tell application "Photos" to import {imageFile}
+            end timeout
+            set end of report to (i as text) & tab & "OK"
+        on error errMsg
+            set end of report to (i as text) & tab & "ERROR" & tab & errMsg
+        end try
+    end repeat
+    set AppleScript's text item delimiters to linefeed
+    return report as text
+end run
+'''
+
 class PhotosExporter:
     def export(self, image_paths):
         """Export images to Photos app"""
-        success = True
-        results = []
-        
-        for path in image_paths:
-            if not Path(path).exists():
+        outcomes = {}
+        existing = []
+        for index, path in enumerate(image_paths):
+            if Path(path).exists():
+                existing.append((index, path))
+            else:
                 logger.error(f"Image file not found: {path}")
-                results.append(f"❌ Failed: File not found - {path}")
-                success = False
-                continue
-                
-            apple_script = f'''
-            tell application "Photos"
-                activate
-                delay 1
-                try
-                    import POSIX file "{path}"
-                    return "Success"
-                on error errMsg
-                    return "Error: " & errMsg
-                end try
-            end tell
-            '''
-            
-            try:
-                result = subprocess.run(
-                    ["osascript", "-e", apple_script], 
-                    capture_output=True, 
-                    text=True, 
-                    check=False
-                )
-                
-                if result.returncode == 0:
-                    logger.info(f"Successfully imported {path}")
-                    results.append(f"✅ Success: {path}")
-                else:
-                    logger.error(f"Error importing {path}: {result.stderr}")
-                    results.append(f"❌ Failed: {result.stderr} - {path}")
-                    success = False
-            except Exception as e:
-                logger.error(f"Exception while importing {path}: {str(e)}")
-                results.append(f"❌ Failed: {str(e)} - {path}")
-                success = False
-        
+                outcomes[index] = (False, f"❌ Failed: File not found - {path}")
+
+        if existing:
+            self._ensure_photos_running()
+            outcomes.update(self._import_all(existing))
+
+        results = [outcomes[index][1] for index in range(len(image_paths))]
+        success = all(outcomes[index][0] for index in range(len(image_paths)))
         return success, results
+
+    def _ensure_photos_running(self):
+        """Launch Photos once, unless it is already running"""
+        try:
+            running = subprocess.run(
+                ["pgrep", "-x", "Photos"],
+                capture_output=True,
+                check=False
+            ).returncode == 0
+        except Exception as e:
+            logger.warning(f"Could not check whether Photos is running: {str(e)}")
+            running = False
+
+        if running:
+            return
+
+        try:
+            subprocess.run(
+                ["osascript", "-e", 'tell application "Photos" to activate'],
+                capture_output=True,
+                check=False
+            )
+            # Give Photos a moment to finish launching before importing
+            time.sleep(1)
+        except Exception as e:
+            logger.error(f"Exception while launching Photos: {str(e)}")
+
+    def _import_all(self, indexed_paths):
+        """Import images into Photos with a single osascript run
+        
+        Returns a dict mapping each index to (success, message).
+        """
+        paths = [path for _, path in indexed_paths]
+        try:
+            result = subprocess.run(
+                ["osascript", "-e", IMPORT_SCRIPT, *paths],
+                capture_output=True,
+                text=True,
+                check=False
+            )
+        except Exception as e:
+            logger.error(f"Exception while importing images: {str(e)}")
+            return {index: (False, f"❌ Failed: {str(e)} - {path}") for index, path in indexed_paths}
+
+        if result.returncode != 0:
+            logger.error(f"Error importing images: {result.stderr}")
+            return {index: (False, f"❌ Failed: {result.stderr} - {path}") for index, path in indexed_paths}
+
+        # The script numbers files from 1, in the order they were passed
+        errors = {}
+        imported = set()
+        for line in result.stdout.splitlines():
+            number, _, status = line.partition('\t')
+            if not number.isdigit():
+                continue
+            status, _, message = status.partition('\t')
+            if status == "OK":
+                imported.add(int(number) - 1)
+            else:
+                errors[int(number) - 1] = message
+
+        outcomes = {}
+        for position, (index, path) in enumerate(indexed_paths):
+            if position in imported:
+                logger.info(f"Successfully imported {path}")
+                outcomes[index] = (True, f"✅ Success: {path}")
+            else:
+                message = errors.get(position, "No result from Photos")
+                logger.error(f"Error importing {path}: {message}")
+                outcomes[index] = (False, f"❌ Failed: {message} - {path}")
+        return outcomes
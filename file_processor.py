@@ -1,10 +1,10 @@
 """File processing utilities for Social Media Collateral Poster."""
 
+import io
 import logging
+from functools import lru_cache
 from typing import Dict, Optional
 
-# Configure logging
-logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
 class FileProcessor:
@@ -28,8 +28,14 @@ class FileProcessor:
             Dictionary with 'sections' and 'cleaned_contents' if successful, None otherwise
         """
         try:
-            content = file.read().decode('utf-8')
-            file.seek(0)  # Reset file pointer
+            if isinstance(file, io.BytesIO):
+                # Streamlit's UploadedFile is a BytesIO: decode straight from
+                # its buffer instead of copying it out with read() first
+                with file.getbuffer() as buffer:
+                    content = str(buffer, 'utf-8')
+            else:
+                content = file.read().decode('utf-8')
+                file.seek(0)  # Reset file pointer
             
             # Process the content
             sections = self.text_processor.parse_markdown_content(content)
@@ -37,16 +43,16 @@ class FileProcessor:
                 logger.error("No sections found in file")
                 return None
                 
-            logger.debug(f"Found raw sections: {list(sections.keys())}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Found raw sections: %s", list(sections))
             
-            # Clean the content for each section
-            cleaned_contents = {}
-            for title, text in sections.items():
-                logger.debug(f"Processing section: {title}")
-                cleaned_text = self.text_processor.clean_text_for_image(text)
-                cleaned_contents[title] = cleaned_text
-                
-            logger.debug("Content processing complete")
+            # Clean the content for each section; sections with identical
+            # bodies (e.g. repeated boilerplate) are only cleaned once
+            clean = lru_cache(maxsize=256)(self.text_processor.clean_text_for_image)
+            cleaned_contents = {
+                title: clean(text)
+                for title, text in sections.items()
+            }
             
             # Return processed content
             return {
@@ -1,20 +1,36 @@
+import argparse
+import asyncio
+import functools
+import hashlib
 import json
 import os
+import random
+import re
+import sys
+import tempfile
+import time
 from pathlib import Path
+import httpx
 import openai
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional, fall back to the standard library
+    _json_loads = json.loads
+
 def load_config():
-    with open('config.json', 'r') as f:
-        return json.load(f)
+    with open('config.json', 'rb') as f:
+        return _json_loads(f.read())
 
 def extract_prompt_and_content(file_path):
     """
     Extracts the main content and prompt from a given markdown file
     
-    The function reads the file, splits it into sections and finds the section
-    starting with '# Prompt'. It then extracts the prompt from this section
-    and returns it along with the main content, which is the remaining sections
-    concatenated back together.
+    The function reads the file line by line and finds the section starting
+    with a '# Prompt' header, which runs until the next level 1 header. It
+    returns the prompt from this section along with the main content, which
+    is every other line of the file.
     
     Args:
         file_path (str): Path to the markdown file
@@ -22,37 +38,42 @@ def extract_prompt_and_content(file_path):
     Returns:
         tuple: A tuple containing the main content and the prompt
     """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    main_parts = []
+    prompt_parts = []
+    in_prompt = False
     
-    # Split the content into sections
-    sections = content.split('# ')
-    
-    # Find the Collaterals section
-    main_content = ''
-    prompt = ''
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('# '):
+                in_prompt = line.startswith('# Prompt')
+                if in_prompt:
+                    # Anything after '# Prompt' on the header line is part of the prompt
+                    prompt_parts = [line[len('# Prompt'):]]
+                    continue
+            (prompt_parts if in_prompt else main_parts).append(line)
     
-    for section in sections:
-        if section.startswith('Prompt'):
-            # Extract prompt from Collaterals section
-            prompt = section[len('Prompt'):].strip()
-        else:
-            # Add other sections to main content
-            if section.strip():
-                main_content += '# ' + section if main_content else section
+    main_content = ''.join(main_parts)
+    prompt = ''.join(prompt_parts).strip()
     
     if not prompt:
         raise ValueError("No '# Prompt' section found in the file")
     
     return main_content.strip(), prompt
 
-def generate_chatgpt_response(content, prompt, api_key):
-    import httpx
-    client = openai.OpenAI(
-        api_key=api_key,
-        http_client=httpx.Client()
-    )
-    
+MODEL = "gpt-3.5-turbo"
+
+# Default number of requests generate_many keeps in flight; main reads
+# max_concurrency from config.json or COLLATERALS_MAX_CONCURRENCY to tune it
+CONCURRENCY = 4
+
+# Attempts per request when the API answers with a rate limit error
+MAX_RETRIES = 5
+
+# Buffer size for writing a complete response to the vault
+WRITE_BUFFER_SIZE = 1 << 20
+
+def build_messages(content, prompt):
+    """Build the chat messages asking the model for formatted collaterals"""
     system_prompt = f"""Your task: {prompt}
 
 IMPORTANT - You must format your response following these rules:
@@ -72,91 +93,460 @@ Example format:
 [LinkedIn content here]
 """
     
-    messages = [
+    return [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": content}
     ]
+
+def ensure_collaterals_header(response_text):
+    """Ensure response starts with # Collaterals"""
+    if not response_text.strip().startswith("# Collaterals"):
+        response_text = "# Collaterals\n\n" + response_text
+    return response_text
+
+# Responses are cached on disk keyed by a hash of the model and messages, so
+# re-running an unchanged file does not call the API again (unless asked to
+# with --refresh)
+LLM_CACHE_DIR = Path(__file__).resolve().parent / '.llm_cache'
+LLM_CACHE_TTL = 30 * 86400  # seconds
+
+def _cache_key(messages):
+    # Serialized so that messages split differently never share a key
+    payload = json.dumps([MODEL, messages], ensure_ascii=False)
+    return hashlib.blake2b(payload.encode('utf-8')).hexdigest()
+
+def _cache_get(key):
+    """Return the cached response for key, or None if missing or expired"""
+    path = LLM_CACHE_DIR / f"{key}.md"
+    try:
+        if time.time() - path.stat().st_mtime > LLM_CACHE_TTL:
+            return None
+        return path.read_text(encoding='utf-8')
+    except OSError:
+        return None
+
+def _cache_set(key, response_text):
+    try:
+        LLM_CACHE_DIR.mkdir(exist_ok=True)
+        # Written to a temp file and moved into place, so an interrupted or
+        # concurrent write never leaves a truncated response to be served
+        fd, tmp_path = tempfile.mkstemp(dir=LLM_CACHE_DIR, prefix=f'.{key}-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(response_text)
+            os.replace(tmp_path, LLM_CACHE_DIR / f"{key}.md")
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass  # The cache is only an optimization
+
+# Connection pool and timeout settings shared by the sync and async clients
+HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+@functools.lru_cache(maxsize=1)
+def get_client(api_key):
+    """Return the OpenAI client for api_key, built once and then reused"""
+    return openai.OpenAI(
+        api_key=api_key,
+        http_client=httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+    )
+
+def generate_chatgpt_response(content, prompt, api_key, use_cache=True):
+    messages = build_messages(content, prompt)
+    key = _cache_key(messages)
+    cached = _cache_get(key) if use_cache else None
+    if cached is not None:
+        return cached
     
+    client = get_client(api_key)
     response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
+        model=MODEL,
         messages=messages
     )
     
-    # Ensure response starts with # Collaterals
-    response_text = response.choices[0].message.content
-    if not response_text.strip().startswith("# Collaterals"):
-        response_text = "# Collaterals\n\n" + response_text
+    response_text = ensure_collaterals_header(response.choices[0].message.content)
+    _cache_set(key, response_text)
+    return response_text
+
+async def agenerate_chatgpt_response(content, prompt, client, use_cache=True):
+    """Async variant of generate_chatgpt_response using an AsyncOpenAI client"""
+    messages = build_messages(content, prompt)
+    key = _cache_key(messages)
+    cached = _cache_get(key) if use_cache else None
+    if cached is not None:
+        return cached
     
+    response = await client.chat.completions.create(
+        model=MODEL,
+        messages=messages
+    )
+    
+    response_text = ensure_collaterals_header(response.choices[0].message.content)
+    _cache_set(key, response_text)
     return response_text
 
+async def generate_many(items, api_key, concurrency=None, use_cache=True):
+    """
+    Generate collaterals for several (content, prompt) pairs concurrently
+    
+    At most `concurrency` requests are in flight at once, and requests that
+    hit the rate limit are retried with exponential backoff. A request that
+    fails anyway gives its exception in place of the response, so the other
+    responses are still returned.
+    
+    Args:
+        items (list): (content, prompt) tuples
+        api_key (str): OpenAI API key
+        concurrency (int, optional): Request limit, defaults to CONCURRENCY
+        use_cache (bool): Reuse cached responses; fresh ones are cached either way
+    
+    Returns:
+        list: Response texts (or exceptions) in the same order as items
+    """
+    sem = asyncio.Semaphore(concurrency or CONCURRENCY)
+    
+    async def bounded(content, prompt, client):
+        async with sem:
+            for attempt in range(MAX_RETRIES):
+                try:
+                    return await agenerate_chatgpt_response(content, prompt, client, use_cache)
+                except openai.RateLimitError:
+                    if attempt == MAX_RETRIES - 1:
+                        raise
+                    await asyncio.sleep(2 ** attempt + random.random())
+    
+    async with openai.AsyncOpenAI(
+        api_key=api_key,
+        http_client=httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+    ) as client:
+        return await asyncio.gather(
+            *[bounded(content, prompt, client) for content, prompt in items],
+            return_exceptions=True
+        )
+
+def stream_chatgpt_response(content, prompt, api_key, use_cache=True):
+    """
+    Stream the ChatGPT response line by line while it is being generated
+    
+    Args:
+        content (str): Main content of the note
+        prompt (str): The prompt taken from the note
+        api_key (str): OpenAI API key
+        use_cache (bool): Reuse a cached response; a fresh one is cached either way
+    
+    Yields:
+        str: Lines of the response without trailing newlines, the first one
+        being '# Collaterals'
+    """
+    messages = build_messages(content, prompt)
+    key = _cache_key(messages)
+    cached = _cache_get(key) if use_cache else None
+    if cached is not None:
+        yield from cached.split('\n')
+        return
+    
+    client = get_client(api_key)
+    stream = client.chat.completions.create(
+        model=MODEL,
+        messages=messages,
+        stream=True
+    )
+    
+    received = []
+    buffer = ''
+    header_checked = False
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content or ''
+        received.append(delta)
+        buffer += delta
+        
+        # Hold lines back until it is clear whether the header is missing
+        if not header_checked:
+            if len(buffer.lstrip()) < len("# Collaterals"):
+                continue
+            buffer = ensure_collaterals_header(buffer)
+            header_checked = True
+        
+        *lines, buffer = buffer.split('\n')
+        yield from lines
+    
+    if not header_checked:
+        buffer = ensure_collaterals_header(buffer)
+    _cache_set(key, ensure_collaterals_header(''.join(received)))
+    yield from buffer.split('\n')
+
+def echo_lines(lines):
+    """Print lines to stdout as they arrive and pass them on"""
+    for line in lines:
+        print(line, flush=True)
+        yield line
+
+def generate_chatgpt_response_batch(items, api_key, poll_interval=30, use_cache=True):
+    """
+    Generate collaterals for several (content, prompt) pairs via the Batch API
+    
+    Batches cost half as much as regular requests but may take up to 24 hours
+    to complete, so this is meant for non-interactive bulk runs. Only items
+    without a cached response are sent. An item the batch has no response
+    for gets a RuntimeError with the reason instead, so the other responses
+    are still returned.
+    
+    Args:
+        items (list): (content, prompt) tuples
+        api_key (str): OpenAI API key
+        poll_interval (int): Seconds to wait between status checks
+        use_cache (bool): Reuse cached responses; fresh ones are cached either way
+    
+    Returns:
+        list: Response texts (or RuntimeErrors) in the same order as items
+    """
+    messages = [build_messages(content, prompt) for content, prompt in items]
+    keys = [_cache_key(item_messages) for item_messages in messages]
+    responses = [_cache_get(key) if use_cache else None for key in keys]
+    pending = [index for index, response in enumerate(responses) if response is None]
+    if not pending:
+        return responses
+    
+    client = get_client(api_key)
+    
+    requests = '\n'.join(
+        json.dumps({
+            "custom_id": str(index),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {"model": MODEL, "messages": messages[index]}
+        })
+        for index in pending
+    )
+    batch_file = client.files.create(
+        file=("collaterals_batch.jsonl", requests.encode('utf-8')),
+        purpose="batch"
+    )
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        time.sleep(poll_interval)
+        batch = client.batches.retrieve(batch.id)
+    
+    # Requests that failed are listed in the error file rather than the
+    # output file; an expired batch may still have some of either
+    reasons = {}
+    for result in _batch_results(client, batch.output_file_id) + _batch_results(client, batch.error_file_id):
+        index = int(result["custom_id"])
+        body = (result.get("response") or {}).get("body") or {}
+        if body.get("choices"):
+            responses[index] = ensure_collaterals_header(body["choices"][0]["message"]["content"])
+            _cache_set(keys[index], responses[index])
+        else:
+            error = result.get("error") or body.get("error") or {}
+            reasons[index] = error.get("message") or f"status {(result.get('response') or {}).get('status_code')}"
+    
+    for index in pending:
+        if responses[index] is None:
+            reason = reasons.get(index, f"batch finished with status '{batch.status}'")
+            responses[index] = RuntimeError(f"Batch {batch.id} returned no response: {reason}")
+    
+    return responses
+
+def _batch_results(client, file_id):
+    """Parsed lines of a batch output or error file; none without a file"""
+    if not file_id:
+        return []
+    return [_json_loads(line) for line in client.files.content(file_id).text.splitlines() if line.strip()]
+
 def save_response(response, input_file_path, vault_path):
+    """
+    Save a response as the next '<name>-collaterals[ N].md' note in the vault
+    
+    Args:
+        response (str or iterable): The response text, or its lines as they stream in
+        input_file_path (str): The note the response was generated from
+        vault_path (str): The Obsidian vault directory
+    
+    Returns:
+        Path: The saved note
+    """
     # Get the original filename without extension
     input_filename = Path(input_file_path).stem
-    
-    # Find the next available counter
-    counter = 0
-    while True:
-        # Create the new filename with counter if needed
-        counter_suffix = f" {counter}" if counter > 0 else ""
-        output_filename = f"{input_filename}-collaterals{counter_suffix}.md"
-        output_path = Path(vault_path) / output_filename
-        
-        if not output_path.exists():
-            break
-        counter += 1
+    vault_str = os.fspath(vault_path)
     
     # Add backlink to the original file
     backlink = f"Generated from: [[{input_filename}]]\n\n"
     
-    # Validate and fix response format
-    lines = response.split('\n')
-    fixed_lines = []
-    in_collaterals = False
-    current_section = None
+    # Write a hidden temp file next to the output and move it into place once
+    # it is complete, so the vault never shows a half-written note; a streamed
+    # response that fails part way (or before its first line) leaves nothing
+    fd, tmp_path = tempfile.mkstemp(dir=vault_str, prefix='.collateral-', suffix='.md.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(backlink)
+            # Validate and fix response format
+            if isinstance(response, str):
+                f.write(fix_response(response))
+            else:
+                for index, line in enumerate(fix_response_lines(response)):
+                    f.write('\n' + line if index else line)
+        # mkstemp creates the file readable by the owner only
+        os.chmod(tmp_path, 0o644)
+        return Path(_publish(tmp_path, vault_str, input_filename))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def _publish(tmp_path, vault_str, input_filename):
+    """
+    Move the finished temp file to the next free note path and return it
     
-    for line in lines:
-        # Handle Collaterals header
-        if line.strip() == "# Collaterals":
-            in_collaterals = True
-            fixed_lines.append(line)
+    An existing note is never overwritten: if another run takes the same
+    counter first, the counter is worked out again and the move retried.
+    """
+    while True:
+        output_path = _next_output_path(vault_str, input_filename)
+        try:
+            # Unlike os.replace, linking fails if the note already exists
+            os.link(tmp_path, output_path)
+        except FileExistsError:
             continue
-            
-        if in_collaterals:
-            # Fix section headers if needed
-            if line.startswith('#'):
-                if not line.startswith('## '):
-                    # Convert any header to level 2
-                    title = line.lstrip('#').strip()
-                    if not title.startswith('Social Media:'):
-                        title = f"Social Media: {title}"
-                    if not any(emoji in title for emoji in ['📱', '📸', '💼', '🐦']):
-                        title = f"📱 {title}"
-                    line = f"## {title}"
-                current_section = line
-            fixed_lines.append(line)
-    
-    # Write the response with the backlink and fixed format
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(backlink + '\n'.join(fixed_lines))
+        except OSError:
+            # The filesystem has no hard links; claim the name exclusively
+            # first, then move the finished note over the empty placeholder
+            try:
+                os.close(os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+            except FileExistsError:
+                continue
+            os.replace(tmp_path, output_path)
+            return output_path
+        os.unlink(tmp_path)
+        return output_path
+
+def _next_output_path(vault_str, input_filename):
+    """Path of the next free '<name>-collaterals[ N].md' note in the vault"""
+    # Find the next available counter from a single directory listing
+    pattern = re.compile(rf'^{re.escape(input_filename)}-collaterals(?: (\d+))?\.md$')
+    with os.scandir(vault_str) as entries:
+        used = [int(m.group(1) or 0) for entry in entries if (m := pattern.match(entry.name))]
+    counter = max(used) + 1 if used else 0
+    
+    # Create the new filename with counter if needed
+    counter_suffix = f" {counter}" if counter > 0 else ""
+    return os.path.join(vault_str, f"{input_filename}-collaterals{counter_suffix}.md")
+
+# The '# Collaterals' header line, and any header line that is not already
+# level 2 (only rewritten after the Collaterals header)
+_COLLATERALS_RE = re.compile(r'^[^\S\n]*# Collaterals[^\S\n]*$', re.M)
+_HEADER_RE = re.compile(r'^(?!## )#.*', re.M)
+_SECTION_EMOJIS = ('📱', '📸', '💼', '🐦')
+
+def _rewrite_header(match):
+    """Turn a header into a level 2 '📱 Social Media: ...' section header"""
+    line = match.group(0)
+    if line.strip() == "# Collaterals":
+        return line
+    title = line.lstrip('#').strip()
+    if not title.startswith('Social Media:'):
+        title = f"Social Media: {title}"
+    if not any(emoji in title for emoji in _SECTION_EMOJIS):
+        title = f"📱 {title}"
+    return f"## {title}"
+
+def fix_response(response):
+    """
+    Fix the format of a complete response
+    
+    Everything before the '# Collaterals' header is dropped, and any other
+    header after it is turned into a level 2 section header.
+    
+    Args:
+        response (str): The response text
+    
+    Returns:
+        str: The fixed response
+    """
+    match = _COLLATERALS_RE.search(response)
+    if match is None:
+        return ''
+    return _HEADER_RE.sub(_rewrite_header, response[match.start():])
+
+def fix_response_lines(lines):
+    """
+    Fix the format of a response, one line at a time; see fix_response
+    
+    Args:
+        lines (iterable): Response lines without trailing newlines
+    
+    Yields:
+        str: The fixed lines
+    """
+    lines = iter(lines)
+    for line in lines:
+        if _COLLATERALS_RE.match(line):
+            yield line
+            break
+    
+    for line in lines:
+        yield _HEADER_RE.sub(_rewrite_header, line)
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate collaterals for Obsidian notes")
+    parser.add_argument('input_files', nargs='*',
+                        help="Markdown files to process (defaults to input_file_path from config.json)")
+    parser.add_argument('--batch', action='store_true',
+                        help="Use the OpenAI Batch API (cheaper, but may take up to 24 hours)")
+    parser.add_argument('--refresh', action='store_true',
+                        help="Ask the API again instead of reusing cached responses")
+    args = parser.parse_args()
+    
     # Load configuration
     config = load_config()
     
     # Extract paths and API key
     vault_path = config['obsidian_vault_path']
-    input_file_path = config['input_file_path']
+    input_file_paths = args.input_files or [config['input_file_path']]
     api_key = config['openai_api_key']
     
-    # Process the input file
-    content, prompt = extract_prompt_and_content(input_file_path)
+    # Process the input files
+    items = [extract_prompt_and_content(path) for path in input_file_paths]
     
-    # Generate response from ChatGPT
-    response = generate_chatgpt_response(content, prompt, api_key)
+    # Generate responses from ChatGPT
+    if args.batch:
+        responses = generate_chatgpt_response_batch(items, api_key, use_cache=not args.refresh)
+    elif len(items) == 1:
+        # Stream a single response, showing it as it arrives; the note itself
+        # is only published once the response is complete
+        responses = [echo_lines(stream_chatgpt_response(*items[0], api_key, use_cache=not args.refresh))]
+    else:
+        concurrency = config.get('max_concurrency') or os.getenv('COLLATERALS_MAX_CONCURRENCY') or CONCURRENCY
+        try:
+            concurrency = int(concurrency)
+        except (TypeError, ValueError):
+            concurrency = 0
+        if concurrency < 1:
+            parser.error("max_concurrency / COLLATERALS_MAX_CONCURRENCY must be a positive whole number")
+        responses = asyncio.run(generate_many(items, api_key, concurrency, use_cache=not args.refresh))
     
-    # Save the response
-    save_response(response, input_file_path, vault_path)
+    # Save the responses; a file that got no response is reported and the
+    # others are still saved
+    failed = 0
+    for response, input_file_path in zip(responses, input_file_paths):
+        if isinstance(response, BaseException):
+            print(f"No collaterals for {input_file_path}: {response}", file=sys.stderr)
+            failed += 1
+            continue
+        save_response(response, input_file_path, vault_path)
     
+    if failed:
+        print(f"Collaterals saved for {len(responses) - failed} of {len(responses)} files")
+        sys.exit(1)
     print(f"Collaterals generated and saved successfully!")
 
 if __name__ == "__main__":
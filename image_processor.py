@@ -1,12 +1,25 @@
-from PIL import Image, ImageDraw, ImageFont
+import PIL
+from PIL import Image, ImageDraw, ImageFont, ImageOps
 import textwrap
+import re
 import emoji
 import logging
-from pathlib import Path
 import streamlit as st
 from typing import Tuple, List, Optional, Dict, Any
 import tempfile
 import os
+import bisect
+import functools
+import itertools
+import weakref
+import atexit
+import multiprocessing
+import threading
+import types
+from collections import OrderedDict
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 # Constants
 DEFAULT_BACKGROUND_COLOR = (248, 248, 248)
@@ -19,11 +32,72 @@ MIN_HEADER_FONT_SIZE = 16
 FALLBACK_SYSTEM_FONT = "/System/Library/Fonts/Helvetica.ttc"
 EMOJI_FONT_PATH = "/System/Library/Fonts/Apple Color Emoji.ttc"
 FONT_PATH = "/System/Library/Fonts/Helvetica.ttc"
+IMAGE_CACHE_SIZE = 32
 
-# Set up logging
-logging.basicConfig(level=logging.ERROR)  # Change to ERROR to suppress detailed logs
 logger = logging.getLogger(__name__)
 
+# Pillow-SIMD (a drop-in Pillow build with vectorized resize, convert and
+# alpha compositing) is still on the 9.0 API, which lacks the Resampling and
+# Quantize enums; look the filters up so both builds work
+_RESAMPLE_LANCZOS = getattr(Image, 'Resampling', Image).LANCZOS
+_QUANTIZE_FASTOCTREE = getattr(Image, 'Quantize', Image).FASTOCTREE
+logger.debug("Using %s %s", 'Pillow-SIMD' if '.post' in PIL.__version__ else 'Pillow', PIL.__version__)
+
+# Every emoji from the emoji package, single code points and compound
+# sequences (flags, keycaps, skin tones, ZWJ sequences) alike
+_EMOJI_SEQUENCES = frozenset(emoji.EMOJI_DATA)
+
+def _char_class(codepoints: frozenset) -> str:
+    """Regex character class body for a set of code points, as ranges.
+    
+    re checks characters outside the BMP against each item in turn, so
+    runs of consecutive code points are collapsed into single ranges.
+    """
+    items = []
+    for _, run in itertools.groupby(enumerate(sorted(codepoints)), lambda pair: pair[1] - pair[0]):
+        run = list(run)
+        first, last = chr(run[0][1]), chr(run[-1][1])
+        items.append(re.escape(first) if first == last else f"{re.escape(first)}-{re.escape(last)}")
+    return ''.join(items)
+
+def _trie_pattern(strings: frozenset) -> str:
+    """Regex matching the longest of strings at a position, as a trie.
+    
+    A flat alternation would try every string in turn; the trie tries each
+    next character once. Strings that end where a longer one continues make
+    the rest optional, and greedy matching takes the longer one first.
+    """
+    trie: Dict[str, Any] = {}
+    for string in strings:
+        node = trie
+        for char in string:
+            node = node.setdefault(char, {})
+        node[''] = None
+    
+    def build(node: Dict[str, Any]) -> str:
+        # Characters that only end a string are collected into one class
+        ends = [char for char, child in node.items() if char and child == {'': None}]
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items())
+                    if char and child != {'': None}]
+        if ends:
+            branches.append('[%s]' % _char_class(frozenset(map(ord, ends))))
+        body = '|'.join(branches)
+        if len(branches) > 1:
+            body = '(?:%s)' % body
+        return '(?:%s)?' % body if '' in node and body else body
+    
+    return build(trie)
+
+# A whole emoji cluster: the longest emoji sequence at a position (so flags
+# and keycaps are one cluster), followed by any skin tone modifiers, emoji
+# variation selectors and zero width joiners with the code point they join,
+# matched in C over a full line. The lookahead rejects characters that can't
+# start an emoji with one class test, before any sequence is tried
+_EMOJI_CLUSTER_RE = re.compile(
+    '(?=[%s])%s(?:\u200d.|[\U0001F3FB-\U0001F3FF\u200d\ufe0f])*' % (
+        _char_class(frozenset(ord(e[0]) for e in _EMOJI_SEQUENCES)), _trie_pattern(_EMOJI_SEQUENCES)),
+    re.DOTALL)
+
 # Constants for font configuration
 FONT_CONFIG = {
     'DEFAULT_TEXT_COLOR': 'black',
@@ -72,6 +146,10 @@ def draw_centered_text(draw: ImageDraw.Draw, text: str, x: int, y: int, font: Im
 def load_font(font_path: str, size: int) -> Optional[ImageFont.FreeTypeFont]:
     """Load a font with error handling.
     
+    Loaded fonts are cached by (font_path, size); FreeTypeFont objects are
+    only read from when measuring and drawing, so they are safe to share.
+    Failures are not cached, so a font installed later is picked up.
+    
     Args:
         font_path: Path to font file
         size: Font size
@@ -79,33 +157,85 @@ def load_font(font_path: str, size: int) -> Optional[ImageFont.FreeTypeFont]:
     Returns:
         Optional[ImageFont.FreeTypeFont]: Loaded font or None if loading fails
     """
-    try:
-        if not font_path:
-            logger.error("Empty font path provided")
-            return ImageFont.truetype(FALLBACK_SYSTEM_FONT, size)
-            
-        if not os.path.exists(font_path):
-            logger.error(f"Font file not found: {font_path}")
-            return ImageFont.truetype(FALLBACK_SYSTEM_FONT, size)
-            
-        return ImageFont.truetype(font_path, size)
-    except Exception as e:
-        logger.error(f"Error loading font {font_path} with size {size}: {e}")
+    if not font_path:
+        logger.error("Empty font path provided")
+    else:
         try:
-            return ImageFont.truetype(FALLBACK_SYSTEM_FONT, size)
+            return _load_font_face(font_path, size)
         except Exception as e:
-            logger.error(f"Failed to load fallback font: {e}")
-            return None
+            if not os.path.exists(font_path):
+                logger.error(f"Font file not found: {font_path}")
+            else:
+                logger.error(f"Error loading font {font_path} with size {size}: {e}")
+    try:
+        return _load_font_face(FALLBACK_SYSTEM_FONT, size)
+    except Exception as e:
+        logger.error(f"Failed to load fallback font: {e}")
+        return None
+
+@functools.lru_cache(maxsize=64)
+def _load_font_face(font_path: str, size: int) -> ImageFont.FreeTypeFont:
+    """Load a font file; failures raise and aren't cached."""
+    return ImageFont.truetype(font_path, size)
+
+# Emoji font files to try, in order of preference
+EMOJI_FONT_CANDIDATES = (
+    EMOJI_FONT_PATH,  # Use the constant defined at the top
+    "/System/Library/Fonts/Apple Color Emoji.ttc",  # Primary macOS emoji font
+    "/usr/share/fonts/truetype/apple-emoji/Apple Color Emoji.ttc",  # Possible Linux location
+    "/usr/share/fonts/truetype/emoji/NotoColorEmoji.ttf",  # Noto fallback
+)
 
 def load_emoji_font(size: int) -> Optional[ImageFont.FreeTypeFont]:
-    """Load emoji font with multiple fallback attempts."""
-    size = max(FONT_CONFIG['MIN_FONT_SIZE'], int(size))
-    emoji_fonts = [
-        EMOJI_FONT_PATH,  # Use the constant defined at the top
-        "/System/Library/Fonts/Apple Color Emoji.ttc",  # Primary macOS emoji font
-        "/usr/share/fonts/truetype/apple-emoji/Apple Color Emoji.ttc",  # Possible Linux location
-        "/usr/share/fonts/truetype/emoji/NotoColorEmoji.ttf",  # Noto fallback
-    ]
+    """Load emoji font with multiple fallback attempts.
+    
+    Returns None when no emoji font loads. Only fonts that load are cached,
+    so an emoji font installed later is picked up on the next call.
+    """
+    try:
+        return _load_emoji_font(size)
+    except OSError:
+        return None
+
+@functools.lru_cache(maxsize=32)
+def _load_emoji_font(size: int) -> ImageFont.FreeTypeFont:
+    """Load the emoji font for a requested size; failures raise and aren't cached.
+    
+    The emoji font file and the size it loads at are resolved once per
+    requested size; the font itself comes from a cache keyed on the resolved
+    (path, size), so sizes that resolve alike share one font object.
+    """
+    size = _resolve_emoji_size(max(FONT_CONFIG['MIN_FONT_SIZE'], int(size)))
+    return _load_emoji_face(_resolve_emoji_font_path(), size)
+
+@functools.cache
+def _resolve_emoji_font_path() -> str:
+    """Find the first emoji font file present on this machine.
+    
+    Raises:
+        FileNotFoundError: If none of the candidates exist
+    """
+    logger.debug("Attempting to find emoji font. Paths to try: %s", EMOJI_FONT_CANDIDATES)
+    for font_path in EMOJI_FONT_CANDIDATES:
+        if os.path.isfile(font_path):
+            logger.debug("Found font file: %s", font_path)
+            return font_path
+        logger.debug("Font file not found: %s", font_path)
+    
+    logger.debug("Could not find emoji font, will fall back to regular font for emoji characters")
+    raise FileNotFoundError("No emoji font found")
+
+@functools.lru_cache(maxsize=16)
+def _resolve_emoji_size(size: int) -> int:
+    """Find the largest size, at or below the clamped size, the emoji font loads at.
+    
+    Bitmap emoji fonts only load at the sizes they have strikes for, so
+    sizes are tried from largest to smallest.
+    
+    Raises:
+        OSError: If the emoji font is missing or loads at none of the sizes
+    """
+    font_path = _resolve_emoji_font_path()
     
     # Try different sizes from largest to smallest
     sizes_to_try = [
@@ -119,27 +249,125 @@ def load_emoji_font(size: int) -> Optional[ImageFont.FreeTypeFont]:
         int(size * 0.3),        # 30%
         max(int(size * 0.25), FONT_CONFIG['MIN_FONT_SIZE'])  # 25% but not smaller than min font size
     ]
-
-    logger.debug(f"Attempting to load emoji font. Paths to try: {emoji_fonts}")
-    logger.debug(f"Font sizes to try: {sizes_to_try}")
+    logger.debug("Font sizes to try: %s", sizes_to_try)
     
-    for font_path in emoji_fonts:
-        if not Path(font_path).exists():
-            logger.debug(f"Font file not found: {font_path}")
-            continue
-            
-        logger.debug(f"Found font file: {font_path}")
-        for try_size in sizes_to_try:
-            try:
-                font = ImageFont.truetype(font_path, try_size)
-                logger.debug(f"Successfully loaded emoji font: {font_path} (size: {try_size})")
-                return font
-            except Exception as e:
-                logger.debug(f"Failed to load {font_path} at size {try_size}: {str(e)}")
-                continue
+    for try_size in sizes_to_try:
+        try:
+            _load_emoji_face(font_path, try_size)
+            logger.debug("Successfully loaded emoji font: %s (size: %s)", font_path, try_size)
+            return try_size
+        except Exception as e:
+            logger.debug("Failed to load %s at size %s: %s", font_path, try_size, e)
     
     logger.debug("Could not load emoji font, will fall back to regular font for emoji characters")
-    return None
+    raise OSError(f"Could not load emoji font {font_path}")
+
+@functools.lru_cache(maxsize=16)
+def _load_emoji_face(font_path: str, size: int) -> ImageFont.FreeTypeFont:
+    """Load the emoji font at a resolved size; failures raise and aren't cached."""
+    return ImageFont.truetype(font_path, size)
+
+@functools.lru_cache(maxsize=4096)
+def _glyph_length(font: ImageFont.FreeTypeFont, text: str) -> float:
+    """Advance width of a character (or emoji sequence).
+    
+    Glyph metrics only depend on the font face and size, so they are
+    measured once per font object; the cache also keeps those fonts alive.
+    """
+    return font.getlength(text, mode='RGBA')
+
+@functools.lru_cache(maxsize=4096)
+def _glyph_mask(font: ImageFont.FreeTypeFont, char: str) -> Optional[Tuple[Image.Image, int, int]]:
+    """Rendered coverage mask of a regular (non-color) glyph or short string.
+    
+    Returns the 'L' mask with its left and top offset from the draw
+    position, or None for text with no ink such as spaces. Repeated
+    characters, and the header and footer drawn on every image, reuse the
+    rasterized mask instead of going through draw.text again.
+    """
+    left, top, right, bottom = font.getbbox(char)
+    if right <= left or bottom <= top:
+        return None
+    mask = Image.new('L', (right - left, bottom - top), 0)
+    ImageDraw.Draw(mask).text((-left, -top), char, font=font, fill=255)
+    return mask, left, top
+
+@functools.lru_cache(maxsize=256)
+def _text_extent(font: ImageFont.FreeTypeFont, text: str) -> Tuple[float, int]:
+    """Advance width and ink height of a line of text.
+    
+    The header and footer are the same on every image, so they are
+    measured once per font instead of on every render.
+    """
+    left, top, right, bottom = font.getbbox(text)
+    return _glyph_length(font, text), bottom - top
+
+def _draw_text_cached(draw: ImageDraw.Draw, xy: Tuple[float, float], text: str,
+                      font: ImageFont.FreeTypeFont, fill: str) -> None:
+    """Draw single-color text, stamping its cached mask where possible.
+    
+    Pillow renders text at fractional positions with a subpixel offset, so
+    only text placed on whole pixels reuses the mask; anything else goes
+    through draw.text as before.
+    """
+    x, y = xy
+    if x != int(x) or y != int(y):
+        draw.text(xy, text, font=font, fill=fill)
+        return
+    glyph = _glyph_mask(font, text)
+    if glyph:
+        mask, left, top = glyph
+        draw.bitmap((int(x) + left, int(y) + top), mask, fill=fill)
+
+def clear_font_caches() -> None:
+    """Drop all cached fonts, font metrics and images, e.g. after fonts change on disk."""
+    _load_font_face.cache_clear()
+    _load_emoji_font.cache_clear()
+    _resolve_emoji_font_path.cache_clear()
+    _resolve_emoji_size.cache_clear()
+    _load_emoji_face.cache_clear()
+    _avg_char_width.cache_clear()
+    _max_chars.cache_clear()
+    _AVG_CHAR_WIDTH_CACHE.clear()
+    _glyph_length.cache_clear()
+    _glyph_mask.cache_clear()
+    _text_extent.cache_clear()
+    plan_layout.cache_clear()
+    with _image_cache_lock:
+        _image_cache.clear()
+
+_ALPHABET = 'abcdefghijklmnopqrstuvwxyz'
+
+@functools.lru_cache(maxsize=128)
+def _avg_char_width(font_path: str, size: int) -> float:
+    """Average width of the lowercase letters for a font, cached per font and size."""
+    font = load_font(font_path, size)
+    # One layout call for the whole alphabet instead of one per letter; with
+    # the basic layout engine this equals the per-letter sum, and with Raqm
+    # it only differs by the font's kerning. Asking the font directly needs
+    # no scratch image to draw on
+    return font.getlength(_ALPHABET, mode='L') / 26
+
+# Average widths for fonts that aren't loaded from a file path (and so
+# can't be keyed by one), held only as long as the font itself
+_AVG_CHAR_WIDTH_CACHE: "weakref.WeakKeyDictionary[ImageFont.FreeTypeFont, float]" = weakref.WeakKeyDictionary()
+
+def _font_avg_char_width(draw: ImageDraw.Draw, font: ImageFont.FreeTypeFont) -> float:
+    """Average lowercase letter width for any font object, cached per font."""
+    font_path = getattr(font, 'path', None)
+    if isinstance(font_path, str):
+        return _avg_char_width(font_path, font.size)
+    
+    width = _AVG_CHAR_WIDTH_CACHE.get(font)
+    if width is None:
+        width = draw.textlength(_ALPHABET, font=font) / 26
+        _AVG_CHAR_WIDTH_CACHE[font] = width
+    return width
+
+@functools.lru_cache(maxsize=128)
+def _max_chars(font_path: str, size: int, width: int) -> int:
+    """Number of characters per wrapped line for text spanning 90% of width."""
+    return int((width * 0.9) / _avg_char_width(font_path, size))
 
 def validate_config(config: Optional[Dict[str, str]]) -> bool:
     """Validate configuration dictionary.
@@ -157,7 +385,17 @@ def validate_config(config: Optional[Dict[str, str]]) -> bool:
             return False
     return True
 
-def process_text_line(text: str, font_size: int, max_width: int, text_color: str, background_color: Optional[str] = None) -> Image.Image:
+def _has_emoji(text: str) -> bool:
+    """Whether text contains an emoji cluster, as draw_text_line finds them.
+    
+    Every emoji, keycaps included, has a non-ASCII code point, so ASCII text
+    is answered without a search.
+    """
+    return not text.isascii() and _EMOJI_CLUSTER_RE.search(text) is not None
+
+def process_text_line(text: str, font_size: int, max_width: int, text_color: str, background_color: Optional[str] = None,
+                      body_font_path: Optional[str] = None, canvas: Optional[Image.Image] = None,
+                      position: Tuple[int, int] = (0, 0)) -> Image.Image:
     """
     Process a line of text, handling both regular text and emojis, and 
     return an image of the processed text.
@@ -168,130 +406,182 @@ def process_text_line(text: str, font_size: int, max_width: int, text_color: str
         max_width (int): The maximum width of the resulting image.
         text_color (str): The color of the text.
         background_color (Optional[str]): The background color of the image.
+        body_font_path (Optional[str]): Body font to use; defaults to the
+            session's body font.
+        canvas (Optional[Image.Image]): RGBA image to draw the line into
+            instead of allocating a new one; the text is not clipped to
+            max_width there.
+        position (Tuple[int, int]): Top-left corner of the line on canvas.
 
     Returns:
-        Image.Image: An image containing the processed text.
+        Image.Image: An image containing the processed text (canvas, if given).
     """
-    # Create initial image with generous height to accommodate text
-    height = int(font_size * 1.5)  # Give enough vertical space for text
-    img = Image.new('RGBA', (max_width, height), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    
     # Load fonts, handling potential errors
     try:
         font_size = max(FONT_CONFIG['MIN_FONT_SIZE'], int(font_size))
-        regular_font = load_font(st.session_state.body_font_path, font_size)
-        emoji_font = load_emoji_font(font_size)
+        regular_font = load_font(body_font_path or st.session_state.body_font_path, font_size)
     except OSError as e:
         logger.error(f"Failed to load fonts: {e}")
-        return img
-
-    x = 0  # Current x position for drawing text
-    y = 0  # Current y position for drawing text
-    line_height = 0  # Track maximum height of the current line
+        if canvas is not None:
+            return canvas
+        return Image.new('RGBA', (max_width, int(font_size * 1.5)), (0, 0, 0, 0))
 
-    i = 0
-    while i < len(text):
-        char = text[i]
-        
-        # Check for compound emojis (e.g., flags or skin tone modifiers)
-        next_char = text[i + 1] if i + 1 < len(text) else None
-        compound_emoji = None
-        if next_char and emoji.is_emoji(char + next_char):
-            compound_emoji = char + next_char
-        
-        # Determine if the current character(s) is an emoji
-        current_text = compound_emoji if compound_emoji else char
-        is_emoji = emoji.is_emoji(current_text)
+    # Split the text into pieces to draw: the whole text when it has no
+    # emojis, otherwise single characters and emoji clusters (including
+    # compound emojis such as flags, keycaps or skin tone modifiers)
+    emoji_font = None
+    if not _has_emoji(text):
+        pieces = [(text, False)]
+    else:
+        emoji_font = load_emoji_font(font_size)
+        pieces = []
+        run_start = 0
+        for match in _EMOJI_CLUSTER_RE.finditer(text):
+            pieces.extend((char, False) for char in text[run_start:match.start()])
+            pieces.append((match.group(), True))
+            run_start = match.end()
+        pieces.extend((char, False) for char in text[run_start:])
+    
+    # The line is as tall as the tallest font's ascent plus descent, so the
+    # final image can be allocated up front and drawn into directly
+    ascent, descent = regular_font.getmetrics()
+    line_height = ascent + descent
+    if emoji_font:
+        line_height = max(line_height, sum(emoji_font.getmetrics()))
+    
+    # Drawing into a caller's canvas skips allocating (and later pasting) a
+    # separate line image
+    if canvas is None:
+        final_img = Image.new('RGBA', (max_width, line_height),
+                             background_color if background_color else (0, 0, 0, 0))
+        draw = ImageDraw.Draw(final_img)
+        left_x, top_y = 0, 0
+    else:
+        final_img = canvas
+        draw = ImageDraw.Draw(final_img)
+        left_x, top_y = position
+        if background_color:
+            draw.rectangle((left_x, top_y, left_x + max_width - 1, top_y + line_height - 1), fill=background_color)
+    
+    x = left_x  # Current x position for drawing text
+    for current_text, is_emoji in pieces:
+        # The image is exactly max_width wide, so once the cursor is more
+        # than an em past its edge nothing further can show
+        if x > left_x + max_width + font_size:
+            break
         
         # Choose appropriate font based on whether it's an emoji
         current_font = emoji_font if is_emoji and emoji_font else regular_font
         
-        # Get text size, with error handling
-        try:
-            bbox = draw.textbbox((0, 0), current_text, font=current_font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-        except Exception as e:
-            logger.warning(f"Failed to get text size for '{current_text}': {e}")
-            text_width = font_size
-            text_height = font_size
-
-        # Update line height if this character has greater height
-        line_height = max(line_height, text_height)
-        
-        # Draw the character, handling emojis differently if needed
+        # Draw the piece, handling emojis differently if needed
         try:
             if is_emoji and emoji_font:
                 try:
-                    draw.text((x, y), current_text, font=current_font, embedded_color=True)
+                    draw.text((x, top_y), current_text, font=current_font, embedded_color=True)
                 except TypeError:
-                    draw.text((x, y), current_text, font=current_font, fill=text_color)
+                    draw.text((x, top_y), current_text, font=current_font, fill=text_color)
+            elif len(pieces) > 1:
+                # Single regular glyphs are stamped from a cached mask
+                glyph = _glyph_mask(current_font, current_text)
+                if glyph:
+                    mask, left, top = glyph
+                    draw.bitmap((int(x) + left, top_y + top), mask, fill=text_color)
             else:
-                draw.text((x, y), current_text, font=current_font, fill=text_color)
+                draw.text((x, top_y), current_text, font=current_font, fill=text_color)
         except Exception as e:
             logger.warning(f"Failed to draw text '{current_text}': {e}")
-
-        # Move cursor to the right by the width of the drawn text
-        x += text_width
         
-        # Skip extra character if a compound emoji was processed
-        if compound_emoji:
-            i += 2
-        else:
-            i += 1
-
-    # Crop to actual content to remove excess space
-    bbox = img.getbbox()
-    if bbox:
-        img = img.crop(bbox)
-    
-    # Create final image with proper dimensions and background color
-    final_height = max(line_height, img.height)
-    final_img = Image.new('RGBA', (max_width, final_height), 
-                         background_color if background_color else (0, 0, 0, 0))
-    
-    # Center the text vertically in the final image
-    paste_y = (final_height - img.height) // 2
-    final_img.paste(img, (0, paste_y), img)
+        # Move cursor to the right by the width of the drawn text
+        if len(pieces) > 1:
+            try:
+                x += _glyph_length(current_font, current_text)
+            except Exception as e:
+                logger.warning(f"Failed to get text size for '{current_text}': {e}")
+                x += font_size
     
     return final_img
 
 def wrap_paragraph(paragraph: str, max_chars: int) -> List[str]:
     """Wrap a paragraph of text to fit within max_chars per line."""
+    return list(_wrap_paragraph_cached(paragraph, max_chars))
+
+@functools.lru_cache(maxsize=1024)
+def _wrap_paragraph_cached(paragraph: str, max_chars: int) -> Tuple[str, ...]:
+    """Wrapped lines of a paragraph, cached since the font size search and
+    every regeneration wrap the same paragraphs at the same widths again."""
     # Remove any existing newlines and wrap the text
-    no_indent = textwrap.fill(paragraph.replace('\n', ' '), width=max_chars, initial_indent='', subsequent_indent='')
-    return no_indent.split('\n')
+    paragraph = paragraph.replace('\n', ' ')
+    
+    # Short paragraphs (most social media lines) fit on one line as they
+    # are; TextWrapper would only hand them back unchanged
+    if len(paragraph) <= max_chars and paragraph.isprintable() and paragraph == paragraph.strip():
+        return (paragraph,) if paragraph else ()
+    return tuple(_text_wrapper(max_chars).wrap(paragraph))
 
-def calculate_text_height(text: str, font_size: int, width: int, draw: ImageDraw.Draw) -> Tuple[float, ImageFont.FreeTypeFont]:
-    """Calculate the height of text given the font size and width."""
-    font = load_font(st.session_state.body_font_path, font_size)
+@functools.lru_cache(maxsize=32)
+def _text_wrapper(width: int) -> textwrap.TextWrapper:
+    """A TextWrapper per line width, built once rather than on every wrap.
+    
+    Keeping one per width (instead of setting .width on a shared wrapper)
+    keeps concurrent Streamlit sessions from changing each other's width.
+    """
+    return textwrap.TextWrapper(width=width)
+
+def calculate_text_height(text: str, font_size: int, width: int, draw: ImageDraw.Draw,
+                          body_font_path: Optional[str] = None) -> Tuple[float, ImageFont.FreeTypeFont]:
+    """Calculate the height of text given the font size and width.
+    
+    The body font defaults to the session's body font.
+    """
+    body_font_path = body_font_path or st.session_state.body_font_path
+    font = load_font(body_font_path, font_size)
     
     # Split into paragraphs
     paragraphs = text.split('\n\n')
     
-    # Calculate total height
-    total_height = 0
     line_height = font_size * 1.5
     
-    for paragraph in paragraphs:
-        if not paragraph.strip():
-            total_height += line_height
-            continue
-            
-        # Get average character width
-        avg_char_width = sum(draw.textlength(char, font=font) for char in 'abcdefghijklmnopqrstuvwxyz') / 26
-        max_chars = int((width * 0.9) / avg_char_width)
-        
-        # Wrap text and count lines
-        wrapped_lines = wrap_paragraph(paragraph, max_chars)
-        total_height += len(wrapped_lines) * line_height
-        
-        # Add space between paragraphs
-        if len(paragraphs) > 1:
-            total_height += line_height
+    # Characters per line depend only on the font and width
+    max_chars = _max_chars(body_font_path, font_size, width)
+    
+    # Count the lines: an empty paragraph takes one line, and with several
+    # paragraphs each wrapped one is followed by a blank line; the height is
+    # then a single multiplication
+    spacer = 1 if len(paragraphs) > 1 else 0
+    line_count = sum(len(wrap_paragraph(paragraph, max_chars)) + spacer if paragraph.strip() else 1
+                     for paragraph in paragraphs)
+    
+    return line_count * line_height, font
+
+@functools.lru_cache(maxsize=8)
+def _load_bg_cached(bg_path: str, mtime: int, width: int, height: int) -> Image.Image:
+    """Open, resize and center a background image; cached by path, mtime and size.
     
-    return total_height, font
+    The file's mtime is part of the cache key, so an edited image is reloaded.
+    """
+    img = Image.open(bg_path)
+    
+    # JPEGs are decoded at the smallest 1/2, 1/4 or 1/8 scale that still
+    # covers the target size, rather than at full resolution (other formats
+    # ignore this)
+    img.draft('RGB', (width, height))
+    
+    # Palette and other modes are converted up front so they are resampled
+    # smoothly; RGB images are only converted once they are at final size
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA')
+    
+    # Scale to cover the target size and crop around the center; fit only
+    # resamples the part of the image that ends up in the result
+    img = ImageOps.fit(img, (width, height), method=_RESAMPLE_LANCZOS, centering=(0.5, 0.5))
+    
+    # Convert to RGBA mode for alpha channel support
+    return img.convert('RGBA')
+
+@functools.lru_cache(maxsize=8)
+def _blank_background(width: int, height: int) -> Image.Image:
+    """Plain background with alpha channel, used when there is no background image."""
+    return Image.new('RGBA', (width, height), DEFAULT_BACKGROUND_COLOR + (255,))
 
 def load_background_image(config: Dict[str, str], width: int, height: int) -> Image.Image:
     """
@@ -305,71 +595,130 @@ def load_background_image(config: Dict[str, str], width: int, height: int) -> Im
     :param height: Height of the final image.
     :return: An Image object of the loaded or created background.
     """
-    if not config:
-        # Create a blank image with alpha channel
-        return Image.new('RGBA', (width, height), DEFAULT_BACKGROUND_COLOR + (255,))
-        
     # Get background image path from config
-    bg_path = config.get('background_image_path')
+    bg_path = config.get('background_image_path') if config else None
     if not bg_path:
-        # Create a blank image with alpha channel
-        return Image.new('RGBA', (width, height), DEFAULT_BACKGROUND_COLOR + (255,))
+        return _blank_background(width, height).copy()
     
-    # Try absolute path first
-    if not os.path.exists(bg_path):
+    # One stat both checks the file exists and gives the mtime for the cache
+    try:
+        mtime = os.stat(bg_path).st_mtime_ns
+    except OSError:
         logger.warning(f"Background image not found at absolute path: {bg_path}")
-        # Create a blank image with alpha channel
-        return Image.new('RGBA', (width, height), DEFAULT_BACKGROUND_COLOR + (255,))
+        return _blank_background(width, height).copy()
     
     try:
-        # Open and convert to RGBA mode for alpha channel support
-        img = Image.open(bg_path).convert('RGBA')
-        
-        # Calculate resize dimensions preserving aspect ratio
-        img_width, img_height = img.size
-        aspect = img_width / img_height
-        
-        if width / height > aspect:
-            # Image is too tall, resize based on width
-            new_width = width
-            new_height = int(width / aspect)
-        else:
-            # Image is too wide, resize based on height
-            new_height = height
-            new_width = int(height * aspect)
-            
-        # Resize with high quality
-        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        
-        # Create a new image with the target size and alpha channel
-        final_img = Image.new('RGBA', (width, height), DEFAULT_BACKGROUND_COLOR + (255,))
-        
-        # Calculate paste position to center
-        paste_x = (width - new_width) // 2
-        paste_y = (height - new_height) // 2
-        
-        # Paste resized image onto center of canvas
-        final_img.paste(img, (paste_x, paste_y))
-        
-        return final_img
+        # Decoded and resized backgrounds are cached by absolute path, so
+        # relative and absolute spellings share an entry; copy since callers
+        # draw on it
+        return _load_bg_cached(os.path.abspath(bg_path), mtime, width, height).copy()
         
     except Exception as e:
         logger.error(f"Error loading background image {bg_path}: {e}")
-        # Create a blank image with alpha channel
-        return Image.new('RGBA', (width, height), DEFAULT_BACKGROUND_COLOR + (255,))
+        return _blank_background(width, height).copy()
+
+# Finished images of recent create_text_image calls, most recently used
+# last. The cache is shared by all processors, since the app builds a new
+# ImageProcessor on every rerun; the lock keeps it safe between threads
+_image_cache: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+_image_cache_lock = threading.Lock()
+
+def _image_cache_key(text: str, config: Dict[str, Any], show_header_footer: bool,
+                     header_font_path: str, body_font_path: str) -> tuple:
+    """Key for the shared image cache.
+    
+    The config may hold nested dicts and lists, so it is keyed by its repr.
+    The background's modification time is included so an edited background
+    file is picked up.
+    """
+    bg_path = config.get('background_image_path')
+    try:
+        bg_mtime = os.stat(bg_path).st_mtime_ns if bg_path else None
+    except OSError:
+        bg_mtime = None
+    return (text, show_header_footer, header_font_path, body_font_path, bg_mtime,
+            repr(sorted(config.items())))
+
+@dataclass(frozen=True)
+class LayoutPlan:
+    """Header, footer and body geometry shared by every image of a template."""
+    header_font: ImageFont.FreeTypeFont
+    header_xy: Optional[Tuple[float, float]]  # None without a header
+    footer_xy: Optional[Tuple[float, float]]  # None without a footer
+    start_y: float  # Top of the area for the body text
+    end_y: float    # Bottom of the area for the body text
+
+@functools.lru_cache(maxsize=16)
+def plan_layout(width: int, height: int, font_size: int, header: str, footer: str,
+                header_font_path: str) -> LayoutPlan:
+    """Work out where the header, footer and body text go.
+    
+    None of this depends on the body text, so a campaign rendering many
+    posters with the same size, header and footer measures them only once.
+    """
+    # Define margin for the image components
+    margin = height * 0.05
+    
+    # Calculate header font size
+    header_font_size = max(int(font_size * FONT_CONFIG['HEADER_FONT_SCALE']), 
+                         FONT_CONFIG['MIN_HEADER_FONT_SIZE'])
+    header_font = load_font(header_font_path, header_font_size)
+    
+    # Place the header if it exists
+    header_xy = None
+    if header:
+        header_width, header_height = _text_extent(header_font, header)
+        header_xy = ((width - header_width) // 2, margin)
+        start_y = margin + header_height + margin
+    else:
+        start_y = margin * 2
+    
+    # Place the footer if it exists
+    footer_xy = None
+    if footer:
+        footer_width, footer_height = _text_extent(header_font, footer)
+        footer_y = height - margin - footer_height
+        footer_xy = ((width - footer_width) // 2, footer_y)
+        end_y = footer_y - margin
+    else:
+        end_y = height - (margin * 2)
+    
+    return LayoutPlan(header_font, header_xy, footer_xy, start_y, end_y)
+
+class _LazySequence:
+    """Read-only sequence of func(i) for i in range(length), computed on access.
+    
+    Lets bisect search a monotone predicate without evaluating it everywhere.
+    """
+    
+    def __init__(self, func, length: int):
+        self._func = func
+        self._length = length
+    
+    def __len__(self) -> int:
+        return self._length
+    
+    def __getitem__(self, index: int):
+        return self._func(index)
 
 class ImageProcessor:
     """Main class for handling image processing operations."""
     
-    def __init__(self, config: Dict[str, Any]):
-        """Initialize the ImageProcessor with configuration."""
+    def __init__(self, config: Dict[str, Any], use_session_state: bool = True):
+        """Initialize the ImageProcessor with configuration.
+        
+        Args:
+            config: Configuration dictionary, including the font paths
+            use_session_state: Keep the font paths in Streamlit's session
+                state, as the app does; worker processes and scripts have no
+                Streamlit session and keep them on the processor instead
+        """
         self.config = config
         self._validate_config()
-        self._font_cache = {}  # Cache for loaded fonts
-        self._emoji_font_cache = {}  # Dedicated cache for emoji fonts
-        self._background_cache = {}  # Cache for background images
         self.header_font = None
         self.body_font = None
+        # Where the header_font_path and body_font_path in use are kept
+        self._font_state = st.session_state if use_session_state else types.SimpleNamespace()
         
         # Load fonts during initialization
         try:
@@ -389,48 +738,38 @@ class ImageProcessor:
                     body_name = font_config['body_fonts'][0]
                     body_path = font_config.get('paths', {}).get(body_name)
             
-            # Store font paths in session state
-            st.session_state.header_font_path = header_path or "/System/Library/Fonts/Helvetica.ttc"
-            st.session_state.body_font_path = body_path or "/System/Library/Fonts/Helvetica.ttc"
+            # Store font paths in the session state (or on the processor)
+            self._font_state.header_font_path = header_path or "/System/Library/Fonts/Helvetica.ttc"
+            self._font_state.body_font_path = body_path or "/System/Library/Fonts/Helvetica.ttc"
             
             # Load fonts with fallback
             self._load_fonts()
         except Exception as e:
             logger.error(f"Failed to initialize fonts: {e}")
             # Use system fallback font
-            st.session_state.header_font_path = "/System/Library/Fonts/Helvetica.ttc"
-            st.session_state.body_font_path = "/System/Library/Fonts/Helvetica.ttc"
+            self._font_state.header_font_path = "/System/Library/Fonts/Helvetica.ttc"
+            self._font_state.body_font_path = "/System/Library/Fonts/Helvetica.ttc"
             self._load_fonts()
             
     def _load_fonts(self) -> None:
         """Load header and body fonts with specified paths and sizes."""
         try:
             # Load header font
-            if not st.session_state.header_font_path or not os.path.exists(st.session_state.header_font_path):
-                logger.error(f"Invalid header font path: {st.session_state.header_font_path}")
-                st.session_state.header_font_path = "/System/Library/Fonts/Helvetica.ttc"
+            if not self._font_state.header_font_path or not os.path.exists(self._font_state.header_font_path):
+                logger.error(f"Invalid header font path: {self._font_state.header_font_path}")
+                self._font_state.header_font_path = "/System/Library/Fonts/Helvetica.ttc"
                 
             # Load body font    
-            if not st.session_state.body_font_path or not os.path.exists(st.session_state.body_font_path):
-                logger.error(f"Invalid body font path: {st.session_state.body_font_path}")
-                st.session_state.body_font_path = "/System/Library/Fonts/Helvetica.ttc"
-            
-            # Try to load fonts
-            try:
-                self.header_font = ImageFont.truetype(st.session_state.header_font_path, 40)
-            except Exception as e:
-                logger.error(f"Failed to load header font: {e}")
-                self.header_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 40)
-                
-            try:
-                self.body_font = ImageFont.truetype(st.session_state.body_font_path, 40)
-            except Exception as e:
-                logger.error(f"Failed to load body font: {e}")
-                self.body_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 40)
+            if not self._font_state.body_font_path or not os.path.exists(self._font_state.body_font_path):
+                logger.error(f"Invalid body font path: {self._font_state.body_font_path}")
+                self._font_state.body_font_path = "/System/Library/Fonts/Helvetica.ttc"
             
-            # Cache the fonts
-            self._font_cache[f"{st.session_state.header_font_path}_40"] = self.header_font
-            self._font_cache[f"{st.session_state.body_font_path}_40"] = self.body_font
+            # Try to load fonts through the shared font cache; load_font
+            # falls back to the system font itself
+            self.header_font = load_font(self._font_state.header_font_path, 40)
+            self.body_font = load_font(self._font_state.body_font_path, 40)
+            if self.header_font is None or self.body_font is None:
+                raise OSError("Failed to load header or body font")
             
         except Exception as e:
             logger.error(f"Error in font loading: {e}")
@@ -449,101 +788,106 @@ class ImageProcessor:
             raise ValueError("Invalid configuration provided")
             
     def _get_cached_font(self, font_path: str, size: int) -> ImageFont.FreeTypeFont:
-        """Get a font from cache or load it if not cached."""
-        cache_key = f"{font_path}_{size}"
-        if cache_key not in self._font_cache:
-            self._font_cache[cache_key] = load_font(font_path, size)
-        return self._font_cache[cache_key]
+        """Get a font from the shared load_font cache."""
+        return load_font(font_path, size)
 
     def _get_cached_emoji_font(self, size: int) -> Optional[ImageFont.FreeTypeFont]:
-        """Get emoji font from cache or load it if not cached."""
-        if size not in self._emoji_font_cache:
-            self._emoji_font_cache[size] = load_emoji_font(size)
-        return self._emoji_font_cache[size]
+        """Get an emoji font from the shared load_emoji_font cache."""
+        return load_emoji_font(size)
 
     def _get_cached_background(self, config: Dict[str, str], width: int, height: int) -> Image.Image:
-        """Get a background image from cache or load it if not cached."""
-        cache_key = f"{config.get('background_image_path', '')}_{width}_{height}"
-        if cache_key not in self._background_cache:
-            self._background_cache[cache_key] = load_background_image(config, width, height)
-        return self._background_cache[cache_key].copy()  # Return a copy to avoid modifying cached image
+        """Get a copy of the background image from the shared background cache."""
+        return load_background_image(config, width, height)
 
     def draw_text_line(self, img: Image.Image, draw: ImageDraw.Draw, line: str, x: int, y: float, 
-                      font_size: int, text_color: str) -> int:
+                      font_size: int, text_color: str,
+                      emoji_font: Optional[ImageFont.FreeTypeFont] = None,
+                      body_font_path: Optional[str] = None,
+                      body_font: Optional[ImageFont.FreeTypeFont] = None) -> int:
         """
         Draw a line of text with mixed emoji and regular text.
 
         :param img: Background image to draw the text on.
         :param draw: ImageDraw object for drawing on the image.
         :param line: Line of text to draw.
-        :param x: X position of the top-left corner of the text.
+        :param x: Unused; the line is centered horizontally on the image.
         :param y: Y position of the top-left corner of the text.
         :param font_size: Font size of the text.
         :param text_color: Color of the text.
+        :param emoji_font: Emoji font to use; looked up by font size if not given.
+        :param body_font_path: Body font to use; defaults to the session's body font.
+        :param body_font: Already loaded body font; takes precedence over body_font_path.
         :return: Width of the drawn text.
         """
         if not line:
             return 0
             
-        # Get cached body font
-        body_font = self._get_cached_font(st.session_state.body_font_path, font_size)
+        # Get cached body font, unless the caller already has it
+        if body_font is None:
+            body_font = self._get_cached_font(body_font_path or self._font_state.body_font_path, font_size)
         if not body_font:
             logger.error("Failed to load body font")
             return 0
         
-        # Get cached emoji font if needed
-        emoji_font = None
-        if any(c in emoji.EMOJI_DATA for c in line):
-            emoji_font = self._get_cached_emoji_font(font_size)
-        
         # Get image width
         width = img.width
         
-        # If line has no emojis, use simple centered text drawing
-        if not any(c in emoji.EMOJI_DATA for c in line):
-            draw_centered_text(draw, line, x, y, body_font, width, text_color)
-            return draw.textlength(line, font=body_font)
-            
-        # For lines with emojis, we need to handle them specially
-        current_text = ""
+        # Split the line into runs of regular text and emoji clusters, and
+        # measure them, in one pass over the emoji matches; the emoji font is
+        # only looked up once an emoji turns up, and emoji-free lines never
+        # get a run measured here
+        segments = []
         total_width = 0
-        
-        # First pass: calculate total width
-        for char in line:
-            if char in emoji.EMOJI_DATA:
-                if current_text:
-                    total_width += draw.textlength(current_text, font=body_font)
-                    current_text = ""
+        has_emoji = False
+        run_start = 0
+        # ASCII lines (the common case) can't contain emojis, which str.isascii
+        # tells without scanning the line
+        if not line.isascii():
+            for match in _EMOJI_CLUSTER_RE.finditer(line):
+                index, cluster_end = match.span()
+                if not has_emoji:
+                    has_emoji = True
+                    if emoji_font is None:
+                        emoji_font = self._get_cached_emoji_font(font_size)
+                if run_start < index:
+                    # Runs between emojis are often a single space, whose
+                    # advance comes from the glyph cache
+                    run = line[run_start:index]
+                    run_width = (_glyph_length(body_font, run) if len(run) == 1
+                                 else draw.textlength(run, font=body_font))
+                    segments.append((run, False, run_width))
+                    total_width += run_width
                 if emoji_font:
-                    total_width += draw.textlength(char, font=emoji_font)
-            else:
-                current_text += char
-        if current_text:
-            total_width += draw.textlength(current_text, font=body_font)
+                    cluster = match.group()
+                    emoji_width = _glyph_length(emoji_font, cluster)
+                    segments.append((cluster, True, emoji_width))
+                    total_width += emoji_width
+                run_start = cluster_end
+        
+        # Most lines have no emojis: measure once and draw the whole line in
+        # a single call, centered the same way as the mixed path below
+        if not has_emoji:
+            line_width = draw.textlength(line, font=body_font)
+            draw.text(((width - line_width) // 2, y), line, font=body_font, fill=text_color)
+            return line_width
+        
+        if run_start < len(line):
+            run = line[run_start:]
+            run_width = draw.textlength(run, font=body_font)
+            segments.append((run, False, run_width))
+            total_width += run_width
             
-        # Calculate starting x position for centering
-        start_x = (width - total_width) // 2
-        current_x = start_x
-        current_text = ""
-        
-        # Second pass: draw the text
-        for char in line:
-            if char in emoji.EMOJI_DATA:
-                if current_text:
-                    text_width = draw.textlength(current_text, font=body_font)
-                    draw.text((current_x, y), current_text, font=body_font, fill=text_color)
-                    current_x += text_width
-                    current_text = ""
-                if emoji_font:
-                    # Draw emoji with embedded color
-                    draw.text((current_x, y), char, font=emoji_font, embedded_color=True)
-                    current_x += draw.textlength(char, font=emoji_font)
+        # Each segment starts where the previous ones end, counting from the
+        # x position that centers the line
+        positions = itertools.accumulate((segment_width for _, _, segment_width in segments),
+                                         initial=(width - total_width) // 2)
+        
+        # Draw each segment, emojis with embedded color
+        for (segment, is_emoji, _), current_x in zip(segments, positions):
+            if is_emoji:
+                draw.text((current_x, y), segment, font=emoji_font, embedded_color=True)
             else:
-                current_text += char
-                
-        # Draw any remaining text
-        if current_text:
-            draw.text((current_x, y), current_text, font=body_font, fill=text_color)
+                draw.text((current_x, y), segment, font=body_font, fill=text_color)
         
         return total_width
 
@@ -587,19 +931,15 @@ class ImageProcessor:
         Returns:
             float: Average width of lowercase letters in the font
         """
-        cache_key = ('avg_width', id(font))
-        if cache_key not in self._font_cache:
-            # Calculate average width of lowercase letters
-            self._font_cache[cache_key] = sum(draw.textlength(char, font=font) 
-                                            for char in 'abcdefghijklmnopqrstuvwxyz') / 26
-        return self._font_cache[cache_key]
+        return _font_avg_char_width(draw, font)
 
     def create_text_image(self, text: str, config: Optional[Dict[str, Any]] = None, show_header_footer: bool = True, **kwargs) -> Image.Image:
         """Create text image with loaded fonts and optional configuration override.
         
         Args:
             text: Text to be added to the image
-            config: Optional configuration dictionary for additional settings
+            config: Optional configuration dictionary for additional settings;
+                set 'quantize' to get an 8-bit palette ('P' mode) image back
             show_header_footer: Whether to show header and footer text (default: True)
             **kwargs: Additional keyword arguments
             
@@ -616,7 +956,21 @@ class ImageProcessor:
         height = image_config.get('height', 700)
         font_size = image_config.get('font_size', 40)  # Default font size
         
-        # Create image and drawing context
+        # Read the session's font paths once for the whole image
+        header_font_path = self._font_state.header_font_path
+        body_font_path = self._font_state.body_font_path
+        
+        # Re-rendering identical text with an identical configuration (e.g.
+        # when regenerating variants) returns a copy of the earlier image
+        cache_key = _image_cache_key(text, image_config, show_header_footer, header_font_path, body_font_path)
+        with _image_cache_lock:
+            cached = _image_cache.get(cache_key)
+            if cached is not None:
+                _image_cache.move_to_end(cache_key)
+        if cached is not None:
+            return cached.copy()
+        
+        # Create image and drawing context (the canvas is always RGBA)
         img = self._get_cached_background(image_config, width, height)
         draw = ImageDraw.Draw(img)
         
@@ -627,76 +981,27 @@ class ImageProcessor:
             # Use header override if provided in config, otherwise use default header
             header_override = image_config.get('header_override', '')
             header = header_override if header_override else image_config.get('header', '')
-            logger.info(f"[ImageProcessor] Using header text: '{header}' (override: '{header_override}')")
+            logger.info("[ImageProcessor] Using header text: '%s' (override: '%s')", header, header_override)
             footer = image_config.get('footer', '')
         
-        # Define margin for the image components
-        margin = height * 0.05
-        
-        # Calculate header font size
-        header_font_size = max(int(font_size * FONT_CONFIG['HEADER_FONT_SCALE']), 
-                             FONT_CONFIG['MIN_HEADER_FONT_SIZE'])
-        header_font = self._get_cached_font(st.session_state.header_font_path, header_font_size)
-        
-        # Calculate and draw the header if it exists
-        if header:
-            header_bbox = draw.textbbox((0, 0), header, font=header_font)
-            header_height = header_bbox[3] - header_bbox[1]
-            header_width = draw.textlength(header, font=header_font)
-            header_x = (width - header_width) // 2
-            header_y = margin
-            draw.text((header_x, header_y), header, font=header_font, fill=FONT_CONFIG['DEFAULT_TEXT_COLOR'])
-            start_y = header_y + header_height + margin
-        else:
-            start_y = margin * 2
-        
-        # Calculate and draw the footer if it exists
-        if footer:
-            footer_bbox = draw.textbbox((0, 0), footer, font=header_font)
-            footer_height = footer_bbox[3] - footer_bbox[1]
-            footer_y = height - margin - footer_height
-            draw.text(((width - draw.textlength(footer, font=header_font)) // 2, footer_y), 
-                     footer, font=header_font, fill=FONT_CONFIG['DEFAULT_TEXT_COLOR'])
-            end_y = footer_y - margin
-        else:
-            end_y = height - (margin * 2)
+        # The header, footer and body area only depend on the template, so
+        # their placement is cached across images
+        plan = plan_layout(width, height, font_size, header, footer, header_font_path)
+        if plan.header_xy:
+            _draw_text_cached(draw, plan.header_xy, header, plan.header_font, FONT_CONFIG['DEFAULT_TEXT_COLOR'])
+        if plan.footer_xy:
+            _draw_text_cached(draw, plan.footer_xy, footer, plan.header_font, FONT_CONFIG['DEFAULT_TEXT_COLOR'])
+        start_y, end_y = plan.start_y, plan.end_y
         
         # Process the main text if it is not empty
         if text.strip():
-            # Get initial body font
-            body_font = self._get_cached_font(st.session_state.body_font_path, font_size)
-            
-            # Calculate initial text height
-            text_height = self._calculate_text_height(text, body_font, width, draw)
             available_height = end_y - start_y
             
             # Adjust font size to fit the available space
-            while text_height > available_height and font_size > FONT_CONFIG['MIN_FONT_SIZE']:
-                font_size -= 2
-                body_font = self._get_cached_font(st.session_state.body_font_path, font_size)
-                text_height = self._calculate_text_height(text, body_font, width, draw)
-            
-            # Calculate the maximum number of characters per line
-            avg_char_width = self.get_avg_char_width(draw, body_font)
-            max_chars = int((width * 0.9) / avg_char_width)
-            
-            # Split text into paragraphs and wrap each one
-            paragraphs = text.split('\n\n')
-            processed_paragraphs = []
-            
-            for i, paragraph in enumerate(paragraphs):
-                if not paragraph.strip():
-                    processed_paragraphs.append("")
-                    continue
-                    
-                wrapped_lines = wrap_paragraph(paragraph, max_chars)
-                processed_paragraphs.extend(wrapped_lines)
-                
-                if len(paragraphs) > 1:
-                    processed_paragraphs.append("")
-            
-            if processed_paragraphs and not processed_paragraphs[-1]:
-                processed_paragraphs.pop()
+            # The text is wrapped while measuring, so the lines for the
+            # chosen size come back with it
+            font_size, body_font, text_height, processed_paragraphs = self._fit_font_size(
+                text, font_size, width, available_height, draw, body_font_path)
             
             # Calculate line spacing
             line_spacing = font_size * FONT_CONFIG['LINE_SPACING_FACTOR']
@@ -707,65 +1012,251 @@ class ImageProcessor:
             # Calculate starting y position to center the text block vertically
             y = start_y + (available_height - text_block_height) / 2
             
+            # Without emojis the whole block is drawn in one multiline call;
+            # Pillow spaces its lines by the height of "A" plus spacing
+            block = '\n'.join(processed_paragraphs)
+            if not _has_emoji(block):
+                spacing = line_spacing - body_font.getbbox("A", mode=img.mode)[3]
+                draw.multiline_text((width / 2, y), block, font=body_font, fill=FONT_CONFIG['DEFAULT_TEXT_COLOR'],
+                                    anchor="ma", align="center", spacing=spacing)
+                processed_paragraphs = []
+            
+            # Lines left to draw here contain emojis; look the emoji font up
+            # once for all of them
+            emoji_font = self.get_emoji_font(font_size) if processed_paragraphs else None
+            
             # Draw each line of text
             for i, line in enumerate(processed_paragraphs):
                 if not line.strip():
                     y += line_spacing
                     continue
                 
-                # Center each line horizontally
-                x = (width - draw.textlength(line, font=body_font)) // 2
-                self.draw_text_line(img, draw, line, x, y, font_size, FONT_CONFIG['DEFAULT_TEXT_COLOR'])
+                # draw_text_line centers the line itself from the widths it
+                # measures, so the line isn't measured again here
+                self.draw_text_line(img, draw, line, 0, y, font_size, FONT_CONFIG['DEFAULT_TEXT_COLOR'],
+                                    emoji_font=emoji_font, body_font=body_font)
                 y += line_spacing
         else:
             pass
         
-        # Return the image with preserved alpha channel
-        return img.convert('RGBA')
+        # Optionally reduce to an 8-bit palette, which makes saved PNGs several
+        # times smaller for flat collateral designs; FASTOCTREE keeps alpha
+        if image_config.get('quantize'):
+            img = img.quantize(colors=256, method=_QUANTIZE_FASTOCTREE)
+        
+        # Keep a copy so callers can draw on the returned image
+        with _image_cache_lock:
+            _image_cache[cache_key] = img.copy()
+            if len(_image_cache) > IMAGE_CACHE_SIZE:
+                _image_cache.popitem(last=False)
+        
+        # Return the image with preserved alpha channel; load_background_image
+        # always hands back an RGBA canvas, so color emoji glyphs are drawn
+        # without mode conversions and no final convert is needed
+        return img
 
+    def create_text_images(self, texts: List[str], configs: Optional[List[Optional[Dict[str, Any]]]] = None,
+                           show_header_footer: bool = True, parallel: bool = False) -> List[Image.Image]:
+        """Create one image per text.
+        
+        Args:
+            texts: Texts to be added to the images
+            configs: Optional configuration override per text, as for
+                create_text_image
+            show_header_footer: Whether to show header and footer text (default: True)
+            parallel: Render in worker processes (see render_all); meant for
+                scripts and batch jobs, not the Streamlit app
+            
+        Returns:
+            List[Image.Image]: Generated images in the same order as texts
+        """
+        if configs is None:
+            configs = [None] * len(texts)
+        elif len(configs) != len(texts):
+            raise ValueError("One config (or None) is needed per text")
+        
+        # A single image isn't worth shipping to a worker
+        if not parallel or len(texts) < 2:
+            return [self.create_text_image(text, config=config, show_header_footer=show_header_footer)
+                    for text, config in zip(texts, configs)]
+        # Workers render with this processor's current fonts
+        font_paths = (self._font_state.header_font_path, self._font_state.body_font_path)
+        return _render_parallel(self.config, texts, configs, show_header_footer, font_paths)
+
+    def _fit_font_size(self, text: str, font_size: int, width: int, available_height: float,
+                       draw: ImageDraw.Draw, body_font_path: str) -> Tuple[int, ImageFont.FreeTypeFont, float, List[str]]:
+        """Find the body font size at which the text fits the available height.
+        
+        Candidate sizes step down by 2 from font_size until the text fits or
+        the size reaches MIN_FONT_SIZE; the largest fitting candidate is found
+        by binary search instead of trying every size in turn.
+        
+        Returns:
+            Tuple of (font_size, body_font, text_height, lines) for the chosen
+            size, where lines are the wrapped lines to draw
+        """
+        measured = {}
+        
+        def measure(step: int) -> float:
+            if step not in measured:
+                font = self._get_cached_font(body_font_path, font_size - 2 * step)
+                measured[step] = (font, *self._calculate_text_height(text, font, width, draw))
+            return measured[step][1]
+        
+        # The last candidate is the first size at or below the minimum; it is
+        # used even if the text still doesn't fit
+        last = max(0, (font_size - FONT_CONFIG['MIN_FONT_SIZE'] + 1) // 2)
+        fits = _LazySequence(lambda step: measure(step) <= available_height, last)
+        
+        # Fitting is monotone in the step (False, ..., False, True, ...), so
+        # bisect finds the first fitting step; the full size is checked first
+        # since most texts fit without shrinking
+        lo = 0 if last == 0 or fits[0] else bisect.bisect_left(fits, True, 1)
+        
+        measure(lo)
+        font, text_height, lines = measured[lo]
+        return font_size - 2 * lo, font, text_height, lines
+    
     def _calculate_text_height(self, text: str, font: ImageFont.FreeTypeFont, width: int, 
-                             draw: ImageDraw.Draw) -> float:
-        """Calculate the total height needed for the text with the given font."""
-        total_height = 0
+                             draw: ImageDraw.Draw) -> Tuple[float, List[str]]:
+        """Calculate the total height needed for the text with the given font.
+        
+        Returns:
+            Tuple of (total_height, lines): the wrapped lines are returned too,
+            with empty strings separating paragraphs, so they don't need to be
+            wrapped again for drawing
+        """
+        lines = []
+        line_count = 0
+        paragraph_gaps = 0
         line_height = font.size * FONT_CONFIG['LINE_SPACING_FACTOR']
         
-        # Calculate average character width for wrapping
-        avg_char_width = self.get_avg_char_width(draw, font)
-        max_chars = int((width * 0.9) / avg_char_width)
+        # Calculate the maximum number of characters per line for wrapping
+        max_chars = _max_chars(font.path, font.size, width)
         
         paragraphs = text.split('\n\n')
         for i, paragraph in enumerate(paragraphs):
             if not paragraph.strip():
-                total_height += line_height
+                line_count += 1
+                lines.append("")
                 continue
                 
             wrapped_lines = wrap_paragraph(paragraph, max_chars)
-            total_height += len(wrapped_lines) * line_height
+            line_count += len(wrapped_lines)
+            lines.extend(wrapped_lines)
             
             # Add extra spacing between paragraphs
             if i < len(paragraphs) - 1:
-                total_height += font.size * (FONT_CONFIG['LINE_SPACING_FACTOR'] - 1)
+                paragraph_gaps += 1
+            if len(paragraphs) > 1:
+                lines.append("")
+        
+        if lines and not lines[-1]:
+            lines.pop()
         
-        return total_height
+        # Only lines and gaps are counted in the loop; the height is
+        # computed from the counts once
+        total_height = (line_count * line_height
+                        + paragraph_gaps * font.size * (FONT_CONFIG['LINE_SPACING_FACTOR'] - 1))
+        return total_height, lines
         
     def get_emoji_font(self, size: int) -> Optional[ImageFont.FreeTypeFont]:
         """Get cached emoji font with the specified size."""
-        size = max(FONT_CONFIG['MIN_FONT_SIZE'], int(size))
-        
-        # Check cache first
-        if size in self._emoji_font_cache:
-            return self._emoji_font_cache[size]
+        return load_emoji_font(size)
+
+# Worker processes reuse the ImageProcessor they built for the last config
+# Processor of a render worker process; workers are single threaded, so it
+# is only ever used by one thread
+_worker_processor: Optional[ImageProcessor] = None
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+
+def _render_one(config: Dict[str, Any], text: str, overrides: Optional[Dict[str, Any]],
+                show_header_footer: bool, font_paths: Optional[Tuple[str, str]] = None) -> Image.Image:
+    """Render a single image in a worker process.
+    
+    The config is a plain dict carrying the font paths, so the worker builds
+    its own ImageProcessor (and fonts) without any Streamlit session. The
+    caller's header and body font paths, if given, take precedence.
+    """
+    global _worker_processor
+    if _worker_processor is None or _worker_processor.config != config:
+        _worker_processor = ImageProcessor(config, use_session_state=False)
+    if font_paths:
+        _worker_processor._font_state.header_font_path, _worker_processor._font_state.body_font_path = font_paths
+    return _worker_processor.create_text_image(text, config=overrides, show_header_footer=show_header_footer)
+
+def _shutdown_render_pool() -> None:
+    """Stop the render pool's workers, e.g. when the interpreter exits."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(cancel_futures=True)
+            _render_pool = None
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    """Get the shared render pool, starting it on first use.
+    
+    Workers are spawned rather than forked, since forking a process that
+    runs other threads is unsafe, and are shut down at exit.
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                               mp_context=multiprocessing.get_context('spawn'))
+            atexit.register(_shutdown_render_pool)
+        return _render_pool
+
+def render_all(config: Dict[str, Any], texts: List[str], overrides: Optional[Dict[str, Any]] = None,
+               show_header_footer: bool = True) -> List[Image.Image]:
+    """Render one image per text, in parallel across processes.
+    
+    Meant for scripts and batch jobs: rasterization is CPU bound and holds
+    the GIL, so the images are rendered in worker processes. The Streamlit
+    app renders in-process through ImageProcessor.create_text_images. A
+    single text is rendered in-process.
+    
+    Args:
+        config: ImageProcessor configuration, including the font paths
+        texts: Texts to render
+        overrides: Optional per-call config overrides (as for create_text_image)
+        show_header_footer: Whether to show header and footer text
         
-        # If not in cache, try to load it
-        emoji_font = load_emoji_font(size)
-        if emoji_font is not None:
-            self._emoji_font_cache[size] = emoji_font
-            
-        return emoji_font
+    Returns:
+        List[Image.Image]: Images in the same order as texts
+    """
+    n = len(texts)
+    if n < 2:
+        processor = ImageProcessor(config, use_session_state=False)
+        return [processor.create_text_image(text, config=overrides, show_header_footer=show_header_footer)
+                for text in texts]
+    return _render_parallel(config, texts, [overrides] * n, show_header_footer)
+
+def _render_parallel(config: Dict[str, Any], texts: List[str], overrides: List[Optional[Dict[str, Any]]],
+                     show_header_footer: bool, font_paths: Optional[Tuple[str, str]] = None) -> List[Image.Image]:
+    """Render texts on the shared pool, each with its own overrides.
+    
+    Falls back to rendering serially, with a processor of its own, if the
+    pool breaks (e.g. when a worker is killed).
+    """
+    n = len(texts)
+    try:
+        return list(_get_render_pool().map(
+            _render_one, [config] * n, texts, overrides, [show_header_footer] * n, [font_paths] * n))
+    except BrokenProcessPool as e:
+        logger.error(f"Render pool failed, rendering serially: {e}")
+        _shutdown_render_pool()
+        processor = ImageProcessor(config, use_session_state=False)
+        if font_paths:
+            processor._font_state.header_font_path, processor._font_state.body_font_path = font_paths
+        return [processor.create_text_image(text, config=text_overrides, show_header_footer=show_header_footer)
+                for text, text_overrides in zip(texts, overrides)]
 
 # Public API
 __all__ = [
     'create_text_image',  # Main image creation function
+    'render_all',         # Parallel rendering of several images
     'load_font',          # Font loading utility
     'validate_config',    # Configuration validation
     'FONT_CONFIG'         # Font configuration constants
@@ -0,0 +1,35 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+import generate_collaterals
+from collateral_generator import save_to_vault
+
+class TestSaveToVault(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.vault = self.tmp.name
+
+    def test_numbering_and_format(self):
+        """Test notes are numbered and formatted like generate_collaterals.py's"""
+        first = save_to_vault("Intro\n# Collaterals\n# Instagram\nText", "/notes/Newsletter.md", self.vault)
+        second = save_to_vault("# Collaterals\nMore", "/notes/Newsletter.md", self.vault)
+        self.assertEqual(first, Path(self.vault, "Newsletter-collaterals.md"))
+        self.assertEqual(second, Path(self.vault, "Newsletter-collaterals 1.md"))
+        self.assertEqual(first.read_text(encoding='utf-8'),
+                         "Generated from: [[Newsletter]]\n\n# Collaterals\n## 📱 Social Media: Instagram\nText")
+
+    def test_existing_note_not_overwritten(self):
+        """Test a note another run creates under the same name is kept"""
+        taken = os.path.join(self.vault, "Newsletter-collaterals.md")
+        free = os.path.join(self.vault, "Newsletter-collaterals 1.md")
+        Path(taken).write_text("other run")
+        with patch.object(generate_collaterals, '_next_output_path', side_effect=[taken, free]):
+            path = save_to_vault("# Collaterals\nText", "Newsletter.md", self.vault)
+        self.assertEqual(path, Path(free))
+        self.assertEqual(Path(taken).read_text(), "other run")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from config_manager import Config, ConfigManager
+from exceptions import ConfigurationError
+
+def make_config_data(**overrides):
+    data = {
+        'header': 'Header',
+        'footer': 'Footer',
+        'background_image_path': 'background.png',
+        'fonts': {'paths': {}, 'header_fonts': [], 'body_fonts': []},
+    }
+    data.update(overrides)
+    return data
+
+class TestConfigFromDict(unittest.TestCase):
+    def assertInvalid(self, data):
+        with self.assertRaises(ConfigurationError):
+            Config.from_dict(data)
+
+    def test_valid_config(self):
+        """Test a valid configuration loads with defaults for optional fields"""
+        config = Config.from_dict(make_config_data(width=800))
+        self.assertEqual(config.header, 'Header')
+        self.assertEqual(config['width'], 800)
+        self.assertEqual(config.height, 700)
+
+    def test_missing_required_field(self):
+        """Test a missing required field is rejected"""
+        data = make_config_data()
+        del data['footer']
+        self.assertInvalid(data)
+
+    def test_required_field_wrong_type(self):
+        """Test a required field that is not a string is rejected"""
+        self.assertInvalid(make_config_data(header=42))
+
+    def test_empty_required_field(self):
+        """Test a blank required field is rejected"""
+        self.assertInvalid(make_config_data(background_image_path='  '))
+
+    def test_invalid_dimensions(self):
+        """Test non-positive dimensions and font size are rejected"""
+        self.assertInvalid(make_config_data(width=0))
+        self.assertInvalid(make_config_data(height=-1))
+        self.assertInvalid(make_config_data(font_size=0))
+
+    def test_missing_fonts(self):
+        """Test a configuration without a fonts section is rejected"""
+        data = make_config_data()
+        del data['fonts']
+        self.assertInvalid(data)
+
+    def test_malformed_fonts_rejected_at_load(self):
+        """Test a malformed fonts section is rejected by from_dict itself"""
+        for fonts in ([], {'paths': {}, 'header_fonts': []},
+                      {'paths': {}, 'header_fonts': 'Lato', 'body_fonts': []},
+                      {'paths': ['Lato.ttf'], 'header_fonts': [], 'body_fonts': []}):
+            with self.subTest(fonts=fonts):
+                self.assertInvalid(make_config_data(fonts=fonts))
+
+    def test_missing_font_files_dropped(self):
+        """Test font paths that do not exist are left out"""
+        config = Config.from_dict(make_config_data(fonts={
+            'paths': {'Missing': '/nonexistent/Missing.ttf'},
+            'header_fonts': ['Missing'],
+            'body_fonts': ['Missing'],
+        }))
+        self.assertNotIn('Missing', config.fonts.paths)
+
+class TestConfigManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'config.json')
+        self.write_config(header='First')
+
+    def write_config(self, **overrides):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(make_config_data(**overrides), f)
+
+    def test_unchanged_file_not_loaded_again(self):
+        """Test a second load of an unchanged file reuses the validated config"""
+        with patch.object(Config, 'from_dict', wraps=Config.from_dict) as from_dict:
+            first = ConfigManager(self.path).load_config()
+            second = ConfigManager(self.path).load_config()
+        self.assertIs(first, second)
+        from_dict.assert_called_once()
+
+    def test_changed_file_loaded_again(self):
+        """Test editing the file gives the new config"""
+        self.assertEqual(ConfigManager(self.path).load_config().header, 'First')
+        self.write_config(header='Second header')
+        self.assertEqual(ConfigManager(self.path).load_config().header, 'Second header')
+
+    def test_missing_file(self):
+        """Test a missing file raises ConfigurationError"""
+        with self.assertRaises(ConfigurationError):
+            ConfigManager(os.path.join(self.tmp.name, 'missing.json')).load_config()
+
+if __name__ == '__main__':
+    unittest.main()
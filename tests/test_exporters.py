@@ -0,0 +1,35 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from exporters import PhotosExporter
+
+class TestPhotosExporter(unittest.TestCase):
+    def setUp(self):
+        self.exporter = PhotosExporter()
+
+    def test_missing_files_do_not_launch_photos(self):
+        """Test Photos is not launched when none of the images exist"""
+        with patch.object(PhotosExporter, '_ensure_photos_running') as ensure, \
+             patch.object(PhotosExporter, '_import_all') as import_all:
+            success, results = self.exporter.export(['/missing/a.png', '/missing/b.png'])
+        self.assertFalse(success)
+        self.assertEqual(len(results), 2)
+        ensure.assert_not_called()
+        import_all.assert_not_called()
+
+    def test_existing_files_launch_photos(self):
+        """Test Photos is launched once before importing the existing images"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'a.png')
+            open(path, 'wb').close()
+            with patch.object(PhotosExporter, '_ensure_photos_running') as ensure, \
+                 patch.object(PhotosExporter, '_import_all', return_value={0: (True, "✅ Exported")}) as import_all:
+                success, results = self.exporter.export([path, '/missing/b.png'])
+        ensure.assert_called_once()
+        import_all.assert_called_once_with([(0, path)])
+        self.assertFalse(success)
+        self.assertEqual(results[0], "✅ Exported")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,324 @@
+import asyncio
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+import generate_collaterals
+from generate_collaterals import save_response, fix_response, fix_response_lines, build_messages, _cache_key
+
+SAMPLE_RESPONSES = [
+    "# Collaterals\n# Instagram\nPost text\n## 📸 Social Media: Already fine\n",
+    "Sure, here you go:\n\n# Collaterals  \n\n# 🐦 Twitter\nTweet\n#hashtag\n",
+    "Intro\n#Collaterals\n# Collaterals\n### LinkedIn\nText",
+    "No header at all\n# Instagram\n",
+    "",
+]
+
+class TestSaveResponse(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.vault = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def note_names(self):
+        return sorted(os.listdir(self.vault))
+
+    def test_counter_numbering(self):
+        """Test notes for the same input are numbered without overwriting"""
+        for _ in range(3):
+            save_response("# Collaterals\nText", "/notes/Newsletter.md", self.vault)
+        self.assertEqual(self.note_names(), [
+            "Newsletter-collaterals 1.md",
+            "Newsletter-collaterals 2.md",
+            "Newsletter-collaterals.md",
+        ])
+
+    def test_counter_follows_highest_number(self):
+        """Test the counter continues after the highest existing note"""
+        Path(self.vault, "Newsletter-collaterals 4.md").write_text("old")
+        save_response("# Collaterals\nText", "Newsletter.md", self.vault)
+        self.assertIn("Newsletter-collaterals 5.md", self.note_names())
+
+    def test_returns_saved_path(self):
+        """Test the path of the saved note is returned"""
+        path = save_response("# Collaterals\nText", "Newsletter.md", self.vault)
+        self.assertEqual(path, Path(self.vault, "Newsletter-collaterals.md"))
+
+    def test_content_and_backlink(self):
+        """Test the note holds the backlink and the fixed response"""
+        save_response("Preamble\n# Collaterals\n# Instagram\nText", "Newsletter.md", self.vault)
+        content = Path(self.vault, "Newsletter-collaterals.md").read_text(encoding='utf-8')
+        self.assertEqual(content, "Generated from: [[Newsletter]]\n\n# Collaterals\n## 📱 Social Media: Instagram\nText")
+
+    def test_streamed_lines_match_string(self):
+        """Test a streamed response is written the same as a complete one"""
+        response = SAMPLE_RESPONSES[1]
+        save_response(response, "a.md", self.vault)
+        save_response(iter(response.split('\n')), "b.md", self.vault)
+        self.assertEqual(Path(self.vault, "a-collaterals.md").read_text(encoding='utf-8')[len("Generated from: [[a]]"):],
+                         Path(self.vault, "b-collaterals.md").read_text(encoding='utf-8')[len("Generated from: [[b]]"):])
+
+    def test_no_temp_file_left(self):
+        """Test only the finished note is left in the vault"""
+        save_response("# Collaterals\nText", "Newsletter.md", self.vault)
+        self.assertEqual(self.note_names(), ["Newsletter-collaterals.md"])
+
+    def test_failed_stream_leaves_nothing(self):
+        """Test a stream failing part way leaves no note and no temp file"""
+        def failing_stream():
+            yield "# Collaterals"
+            yield "# Instagram"
+            raise ConnectionError("stream dropped")
+
+        with self.assertRaises(ConnectionError):
+            save_response(failing_stream(), "Newsletter.md", self.vault)
+        self.assertEqual(self.note_names(), [])
+
+    def test_existing_note_not_overwritten(self):
+        """Test a note created by another run under the same name is kept"""
+        taken = os.path.join(self.vault, "Newsletter-collaterals.md")
+        free = os.path.join(self.vault, "Newsletter-collaterals 1.md")
+        Path(taken).write_text("other run")
+        # The first lookup races with the other run and returns its path
+        with patch.object(generate_collaterals, '_next_output_path', side_effect=[taken, free]):
+            save_response("# Collaterals\nText", "Newsletter.md", self.vault)
+        self.assertEqual(Path(taken).read_text(), "other run")
+        self.assertTrue(Path(free).read_text(encoding='utf-8').endswith("# Collaterals\nText"))
+        self.assertEqual(self.note_names(), ["Newsletter-collaterals 1.md", "Newsletter-collaterals.md"])
+
+class TestFixResponse(unittest.TestCase):
+    def test_lines_match_fix_response(self):
+        """Test fix_response_lines gives the same result as fix_response"""
+        for response in SAMPLE_RESPONSES:
+            with self.subTest(response=response):
+                self.assertEqual('\n'.join(fix_response_lines(response.split('\n'))), fix_response(response))
+
+    def test_drops_text_before_header(self):
+        """Test everything before the Collaterals header is dropped"""
+        self.assertEqual(fix_response("Intro\n# Collaterals\nText"), "# Collaterals\nText")
+
+    def test_missing_header(self):
+        """Test a response without the Collaterals header gives no text"""
+        self.assertEqual(fix_response("# Instagram\nText"), "")
+
+    def test_rewrites_headers(self):
+        """Test headers after the Collaterals header become section headers"""
+        self.assertEqual(fix_response("# Collaterals\n# 💼 LinkedIn\n## Kept"),
+                         "# Collaterals\n## Social Media: 💼 LinkedIn\n## Kept")
+
+class TestCacheKey(unittest.TestCase):
+    def test_same_messages_same_key(self):
+        """Test equal requests share a cache key"""
+        self.assertEqual(_cache_key(build_messages("content", "prompt")),
+                         _cache_key(build_messages("content", "prompt")))
+
+    def test_different_messages_different_key(self):
+        """Test requests that only differ in how the text is split get different keys"""
+        split = [{"role": "user", "content": "a"}, {"role": "user", "content": "b"}]
+        joined = [{"role": "user", "content": "ab"}]
+        self.assertNotEqual(_cache_key(split), _cache_key(joined))
+
+    def test_model_is_part_of_key(self):
+        """Test changing the model changes the cache key"""
+        messages = build_messages("content", "prompt")
+        key = _cache_key(messages)
+        with patch.object(generate_collaterals, 'MODEL', 'another-model'):
+            self.assertNotEqual(_cache_key(messages), key)
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = patch.object(generate_collaterals, 'LLM_CACHE_DIR', Path(self.tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        key = _cache_key(build_messages("content", "prompt"))
+        generate_collaterals._cache_set(key, "# Collaterals\nCached")
+
+    def test_cached_response_skips_api(self):
+        """Test a cached response is returned without creating a client"""
+        with patch.object(generate_collaterals, 'get_client') as get_client:
+            response = generate_collaterals.generate_chatgpt_response("content", "prompt", "key")
+        self.assertEqual(response, "# Collaterals\nCached")
+        get_client.assert_not_called()
+
+    def test_refresh_bypasses_cache(self):
+        """Test use_cache=False calls the API and stores the new response"""
+        with patch.object(generate_collaterals, 'get_client') as get_client:
+            completion = get_client.return_value.chat.completions.create.return_value
+            completion.choices[0].message.content = "# Collaterals\nFresh"
+            response = generate_collaterals.generate_chatgpt_response("content", "prompt", "key", use_cache=False)
+        self.assertEqual(response, "# Collaterals\nFresh")
+        self.assertEqual(generate_collaterals.generate_chatgpt_response("content", "prompt", "key"), response)
+
+    def test_cache_write_is_atomic(self):
+        """Test a failed cache write leaves neither an entry nor a temp file"""
+        key = _cache_key(build_messages("other", "prompt"))
+        with patch.object(generate_collaterals.os, 'replace', side_effect=OSError("disk full")):
+            generate_collaterals._cache_set(key, "# Collaterals\nPartial")
+        self.assertIsNone(generate_collaterals._cache_get(key))
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), [f"{_cache_key(build_messages('content', 'prompt'))}.md"])
+
+class FakeBatchClient:
+    """Client answering Batch API calls for whichever items were sent"""
+    def __init__(self, answers):
+        self.answers = answers
+        self.sent = []
+        self.files = self
+        self.batches = self
+
+    def create(self, **kwargs):
+        if 'file' in kwargs:
+            self.sent = [json.loads(line) for line in kwargs['file'][1].decode('utf-8').splitlines()]
+            return SimpleNamespace(id='file-in')
+        return SimpleNamespace(id='batch', status='completed', output_file_id='file-out', error_file_id='file-err')
+
+    def content(self, file_id):
+        lines = []
+        for request in self.sent:
+            answer = self.answers.get(request["body"]["messages"][1]["content"])
+            if file_id == 'file-out' and answer is not None:
+                lines.append({"custom_id": request["custom_id"], "response": {
+                    "status_code": 200, "body": {"choices": [{"message": {"content": answer}}]}}})
+            elif file_id == 'file-err' and answer is None:
+                lines.append({"custom_id": request["custom_id"], "response": {
+                    "status_code": 400, "body": {"error": {"message": "context length exceeded"}}}})
+        return SimpleNamespace(text='\n'.join(map(json.dumps, lines)))
+
+class TestBatchCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = patch.object(generate_collaterals, 'LLM_CACHE_DIR', Path(self.tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        generate_collaterals._cache_set(_cache_key(build_messages("cached", "prompt")), "# Collaterals\nCached")
+        self.client = FakeBatchClient({"cached": "# Collaterals\nNew", "fresh": "# Collaterals\nFresh"})
+        patcher = patch.object(generate_collaterals, 'get_client', return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_only_uncached_items_sent(self):
+        """Test cached items are not sent and fresh responses are cached"""
+        items = [("cached", "prompt"), ("fresh", "prompt")]
+        responses = generate_collaterals.generate_chatgpt_response_batch(items, "key", poll_interval=0)
+        self.assertEqual(responses, ["# Collaterals\nCached", "# Collaterals\nFresh"])
+        self.assertEqual([request["custom_id"] for request in self.client.sent], ["1"])
+        self.assertEqual(generate_collaterals._cache_get(_cache_key(build_messages("fresh", "prompt"))),
+                         "# Collaterals\nFresh")
+
+    def test_all_cached_skips_api(self):
+        """Test a batch of cached items does not create a client"""
+        responses = generate_collaterals.generate_chatgpt_response_batch([("cached", "prompt")], "key")
+        self.assertEqual(responses, ["# Collaterals\nCached"])
+        generate_collaterals.get_client.assert_not_called()
+
+    def test_missing_items_keep_other_responses(self):
+        """Test an item without a response gets its reason and the others are kept"""
+        items = [("fresh", "prompt"), ("too long", "prompt")]
+        responses = generate_collaterals.generate_chatgpt_response_batch(items, "key", poll_interval=0)
+        self.assertEqual(responses[0], "# Collaterals\nFresh")
+        self.assertIsInstance(responses[1], RuntimeError)
+        self.assertIn("context length exceeded", str(responses[1]))
+
+    def test_refresh_sends_everything(self):
+        """Test use_cache=False sends cached items again"""
+        responses = generate_collaterals.generate_chatgpt_response_batch(
+            [("cached", "prompt")], "key", poll_interval=0, use_cache=False)
+        self.assertEqual(responses, ["# Collaterals\nNew"])
+        self.assertEqual(len(self.client.sent), 1)
+
+class TestGenerateMany(unittest.TestCase):
+    def test_failed_request_keeps_other_responses(self):
+        """Test an error on one item is returned in its place and the others complete"""
+        async def fake_generate(content, prompt, client, use_cache=True):
+            if content == "bad":
+                raise ValueError("request too large")
+            return f"# Collaterals\n{content}"
+
+        with patch.object(generate_collaterals, 'agenerate_chatgpt_response', fake_generate):
+            responses = asyncio.run(generate_collaterals.generate_many(
+                [("a", "p"), ("bad", "p"), ("c", "p")], "key", concurrency=2))
+        self.assertEqual(responses[0], "# Collaterals\na")
+        self.assertIsInstance(responses[1], ValueError)
+        self.assertEqual(responses[2], "# Collaterals\nc")
+
+class TestMain(unittest.TestCase):
+    def run_main(self, responses, *args, config=None):
+        config = {'obsidian_vault_path': 'vault', 'openai_api_key': 'key', **(config or {})}
+
+        async def fake_generate_many(items, api_key, concurrency=None, use_cache=True):
+            self.concurrency = concurrency
+            return responses
+
+        with patch.object(sys, 'argv', ['generate_collaterals.py', *args, 'a.md', 'b.md']), \
+             patch.object(generate_collaterals, 'load_config', return_value=config), \
+             patch.object(generate_collaterals, 'extract_prompt_and_content', return_value=("content", "prompt")), \
+             patch.object(generate_collaterals, 'generate_chatgpt_response_batch', return_value=responses), \
+             patch.object(generate_collaterals, 'generate_many', fake_generate_many), \
+             patch.object(generate_collaterals, 'save_response') as save, \
+             patch('sys.stdout', new_callable=io.StringIO), patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            try:
+                generate_collaterals.main()
+            except SystemExit as e:
+                return save, stderr.getvalue(), e.code
+        return save, stderr.getvalue(), 0
+
+    def test_failed_file_reported_others_saved(self):
+        """Test a file without a response is reported and the others are saved"""
+        save, stderr, code = self.run_main(["# Collaterals\nA", RuntimeError("no response")], '--batch')
+        save.assert_called_once_with("# Collaterals\nA", 'a.md', 'vault')
+        self.assertIn("b.md: no response", stderr)
+        self.assertEqual(code, 1)
+
+    def test_all_saved(self):
+        """Test every response is saved when none failed"""
+        save, stderr, code = self.run_main(["# Collaterals\nA", "# Collaterals\nB"], '--batch')
+        self.assertEqual(save.call_count, 2)
+        self.assertEqual((stderr, code), ("", 0))
+
+    def test_single_file_streamed_to_stdout(self):
+        """Test a single streamed response is shown line by line before it is saved"""
+        stdout = io.StringIO()
+
+        def fake_stream(content, prompt, api_key, use_cache=True):
+            yield "# Collaterals"
+            self.assertIn("# Collaterals\n", stdout.getvalue())
+            yield "Text"
+
+        saved = []
+        with patch.object(sys, 'argv', ['generate_collaterals.py', 'a.md']), \
+             patch.object(generate_collaterals, 'load_config',
+                          return_value={'obsidian_vault_path': 'vault', 'openai_api_key': 'key'}), \
+             patch.object(generate_collaterals, 'extract_prompt_and_content', return_value=("content", "prompt")), \
+             patch.object(generate_collaterals, 'stream_chatgpt_response', fake_stream), \
+             patch.object(generate_collaterals, 'save_response',
+                          side_effect=lambda response, *args: saved.append(list(response))), \
+             patch('sys.stdout', stdout):
+            generate_collaterals.main()
+        self.assertEqual(saved, [["# Collaterals", "Text"]])
+        self.assertTrue(stdout.getvalue().startswith("# Collaterals\nText\n"))
+
+    def test_concurrency_from_environment(self):
+        """Test COLLATERALS_MAX_CONCURRENCY sets the request limit"""
+        with patch.dict(os.environ, {'COLLATERALS_MAX_CONCURRENCY': '7'}):
+            self.run_main(["# Collaterals\nA", "# Collaterals\nB"])
+        self.assertEqual(self.concurrency, 7)
+
+    def test_invalid_concurrency(self):
+        """Test a bad concurrency value is reported as a usage error"""
+        for value in ('many', '0'):
+            with self.subTest(value=value), patch.dict(os.environ, {'COLLATERALS_MAX_CONCURRENCY': value}):
+                save, stderr, code = self.run_main(["# Collaterals\nA", "# Collaterals\nB"])
+                self.assertEqual(code, 2)
+                save.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,279 @@
+import os
+import random
+import shutil
+import tempfile
+import textwrap
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock, patch
+import emoji
+from PIL import Image, ImageChops, ImageDraw
+import image_processor
+from image_processor import render_all
+
+CONFIG = {'fonts': {'paths': {}, 'header_fonts': [], 'body_fonts': []}}
+
+FONT_PATH = os.path.join(os.path.dirname(__file__), 'fonts', 'Lato-Regular.ttf')
+FONT_CONFIG = {
+    'header': 'Header',
+    'footer': 'Footer',
+    'width': 400,
+    'height': 400,
+    'font_size': 32,
+    'fonts': {'paths': {'Lato': FONT_PATH}, 'header_fonts': ['Lato'], 'body_fonts': ['Lato']},
+}
+
+def make_processor(config=FONT_CONFIG):
+    """Processor rendering with the bundled font, without a Streamlit session"""
+    return image_processor.ImageProcessor(config, use_session_state=False)
+
+def fake_render_one(config, text, overrides, show_header_footer, font_paths=None):
+    # Later texts finish first, so results arrive out of order
+    time.sleep(0.01 * (5 - int(text)))
+    return (text, overrides, show_header_footer)
+
+class BrokenPool:
+    def map(self, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+class TestRenderAll(unittest.TestCase):
+    def setUp(self):
+        self.pool = ThreadPoolExecutor(max_workers=5)
+        self.addCleanup(self.pool.shutdown)
+
+    def test_results_in_input_order(self):
+        """Test images come back in the order of the texts"""
+        texts = ['1', '2', '3', '4', '5']
+        with patch.object(image_processor, '_get_render_pool', return_value=self.pool), \
+             patch.object(image_processor, '_render_one', fake_render_one):
+            results = render_all(CONFIG, texts, {'header_override': 'H'}, show_header_footer=False)
+        self.assertEqual(results, [(text, {'header_override': 'H'}, False) for text in texts])
+
+    def test_single_text_renders_in_process(self):
+        """Test a single text is rendered without starting the pool"""
+        with patch.object(image_processor, '_get_render_pool') as get_pool, \
+             patch.object(image_processor, 'ImageProcessor') as processor_cls:
+            processor_cls.return_value.create_text_image.return_value = 'image'
+            results = render_all(CONFIG, ['1'])
+        self.assertEqual(results, ['image'])
+        get_pool.assert_not_called()
+        processor_cls.assert_called_once_with(CONFIG, use_session_state=False)
+
+    def test_serial_fallback_on_broken_pool(self):
+        """Test a broken pool is shut down and the texts are rendered serially"""
+        processor = MagicMock()
+        processor.create_text_image.side_effect = lambda text, config=None, show_header_footer=True: text
+        with patch.object(image_processor, '_get_render_pool', return_value=BrokenPool()), \
+             patch.object(image_processor, '_shutdown_render_pool') as shutdown, \
+             patch.object(image_processor, 'ImageProcessor', return_value=processor) as processor_cls:
+            results = render_all(CONFIG, ['1', '2', '3'])
+        self.assertEqual(results, ['1', '2', '3'])
+        shutdown.assert_called_once()
+        processor_cls.assert_called_once_with(CONFIG, use_session_state=False)
+
+class TestImageCache(unittest.TestCase):
+    def setUp(self):
+        image_processor.clear_font_caches()
+
+    def test_cache_shared_between_processors(self):
+        """Test a new processor gets the image an earlier one rendered"""
+        first = make_processor().create_text_image("Cached text")
+        with patch.object(image_processor, 'plan_layout', side_effect=AssertionError("rendered again")):
+            second = make_processor().create_text_image("Cached text")
+        self.assertEqual(first.tobytes(), second.tobytes())
+
+    def test_cached_image_is_a_copy(self):
+        """Test drawing on a returned image does not change the cached one"""
+        processor = make_processor()
+        first = processor.create_text_image("Cached text")
+        expected = first.tobytes()
+        first.paste((255, 0, 0, 255), (0, 0, first.width, first.height))
+        second = processor.create_text_image("Cached text")
+        self.assertIsNot(first, second)
+        self.assertEqual(second.tobytes(), expected)
+
+    def test_different_text_not_shared(self):
+        """Test a different text is not served from the cache"""
+        processor = make_processor()
+        self.assertNotEqual(processor.create_text_image("One").tobytes(),
+                            processor.create_text_image("Two").tobytes())
+
+def random_text(rng):
+    """Random paragraphs of random words, for comparing against references"""
+    words = ['a', 'to', 'the', 'post', 'social', 'collateral', 'championship', 'x' * 30]
+    return '\n\n'.join(' '.join(rng.choice(words) for _ in range(rng.randint(0, 60)))
+                         for _ in range(rng.randint(1, 4)))
+
+class TestFontCache(unittest.TestCase):
+    def setUp(self):
+        image_processor.clear_font_caches()
+
+    def test_font_loaded_once(self):
+        """Test a font is loaded once per path and size"""
+        with patch.object(image_processor.ImageFont, 'truetype', wraps=image_processor.ImageFont.truetype) as truetype:
+            font = image_processor.load_font(FONT_PATH, 30)
+            self.assertIs(image_processor.load_font(FONT_PATH, 30), font)
+        truetype.assert_called_once()
+
+    def test_clear_font_caches(self):
+        """Test clearing the caches loads the font again"""
+        font = image_processor.load_font(FONT_PATH, 30)
+        image_processor.clear_font_caches()
+        self.assertIsNot(image_processor.load_font(FONT_PATH, 30), font)
+
+    def test_failure_not_cached(self):
+        """Test a font that failed to load is loaded once it appears"""
+        with tempfile.TemporaryDirectory() as tmp:
+            font_path = os.path.join(tmp, 'Lato-Regular.ttf')
+            with patch.object(image_processor, 'FALLBACK_SYSTEM_FONT', os.path.join(tmp, 'missing.ttc')):
+                self.assertIsNone(image_processor.load_font(font_path, 30))
+                shutil.copy(FONT_PATH, font_path)
+                self.assertEqual(image_processor.load_font(font_path, 30).path, font_path)
+
+    def test_missing_emoji_font_not_cached(self):
+        """Test an emoji font that was missing is loaded once it appears"""
+        with tempfile.TemporaryDirectory() as tmp:
+            font_path = os.path.join(tmp, 'Emoji.ttf')
+            with patch.object(image_processor, 'EMOJI_FONT_CANDIDATES', (font_path,)):
+                self.assertIsNone(image_processor.load_emoji_font(30))
+                shutil.copy(FONT_PATH, font_path)
+                self.assertEqual(image_processor.load_emoji_font(30).path, font_path)
+
+    def test_glyph_length_matches_textlength(self):
+        """Test cached glyph advances match textlength and are measured once"""
+        font = image_processor.load_font(FONT_PATH, 30)
+        draw = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+        for char in "abcabc":
+            self.assertEqual(image_processor._glyph_length(font, char), draw.textlength(char, font=font))
+        self.assertEqual(image_processor._glyph_length.cache_info().misses, 3)
+
+class TestWrapParagraph(unittest.TestCase):
+    def test_matches_text_wrapper(self):
+        """Test wrapping gives TextWrapper's lines, including for one-line paragraphs"""
+        pieces = ['a', 'word', 'longer', 'x' * 25, ' ', '  ', '\t', '\n', '-', 'Grüße', '🎉']
+        rng = random.Random(0)
+        for _ in range(5000):
+            paragraph = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 20)))
+            width = rng.randint(1, 80)
+            expected = textwrap.TextWrapper(width=width).wrap(paragraph.replace('\n', ' '))
+            self.assertEqual(image_processor._wrap_paragraph_cached(paragraph, width), tuple(expected),
+                             (paragraph, width))
+
+def reference_clusters(text):
+    """Emoji cluster spans found one position at a time: the longest emoji at
+    a position, then any skin tone modifiers, variation selectors and ZWJ
+    joined code points"""
+    longest = max(map(len, emoji.EMOJI_DATA))
+    spans = []
+    i = 0
+    while i < len(text):
+        size = next((n for n in range(min(longest, len(text) - i), 0, -1) if text[i:i + n] in emoji.EMOJI_DATA), 0)
+        if not size:
+            i += 1
+            continue
+        end = i + size
+        while end < len(text) and (text[end] in '\u200d\ufe0f' or 0x1F3FB <= ord(text[end]) <= 0x1F3FF):
+            end += 2 if text[end] == '\u200d' and end + 1 < len(text) else 1
+        spans.append((i, end))
+        i = end
+    return spans
+
+class TestEmojiClusters(unittest.TestCase):
+    def test_compound_emojis_are_one_cluster(self):
+        """Test flags, keycaps, skin tones and ZWJ sequences are single clusters"""
+        for cluster in ['🇩🇪', '1️⃣', '#️⃣', '👍🏽', '👨\u200d👩\u200d👧', '🏳️\u200d🌈', '❤️', '😀']:
+            with self.subTest(cluster=cluster):
+                self.assertEqual([m.group() for m in image_processor._EMOJI_CLUSTER_RE.finditer(f"a {cluster} b")],
+                                 [cluster])
+                self.assertTrue(image_processor._has_emoji(f"a {cluster} b"))
+
+    def test_no_emoji(self):
+        """Test text without emojis has no clusters"""
+        for text in ["Plain ASCII 123 #tag *", "Grüße aus München – café", ""]:
+            with self.subTest(text=text):
+                self.assertEqual(list(image_processor._EMOJI_CLUSTER_RE.finditer(text)), [])
+                self.assertFalse(image_processor._has_emoji(text))
+
+    def test_matches_reference(self):
+        """Test the regex finds the clusters a walk over the text finds"""
+        emojis = sorted(emoji.EMOJI_DATA)
+        extras = ['a', ' ', '1', '#', 'ü', '\u200d', '\ufe0f', '\u20e3', '\U0001F3FD', '\U0001F1E9', '\U0001F1EA']
+        rng = random.Random(0)
+        for _ in range(3000):
+            text = ''.join(rng.choice(emojis) if rng.random() < 0.3 else rng.choice(extras)
+                           for _ in range(rng.randint(0, 12)))
+            spans = [m.span() for m in image_processor._EMOJI_CLUSTER_RE.finditer(text)]
+            self.assertEqual(spans, reference_clusters(text), text)
+            self.assertEqual(image_processor._has_emoji(text), bool(spans), text)
+
+    def test_flag_line_drawn_with_emoji_font(self):
+        """Test a line with a flag skips the plain text fast path"""
+        processor = make_processor()
+        image_processor.clear_font_caches()
+        with patch.object(processor, 'draw_text_line', wraps=processor.draw_text_line) as draw_text_line:
+            processor.create_text_image("Flag 🇩🇪 here", show_header_footer=False)
+        draw_text_line.assert_called_once()
+        self.assertEqual(draw_text_line.call_args.args[2], "Flag 🇩🇪 here")
+
+class TestFitFontSize(unittest.TestCase):
+    def linear_fit(self, processor, text, font_size, width, available_height, draw):
+        """The font size search create_text_image used to do, one size at a time"""
+        font = processor._get_cached_font(FONT_PATH, font_size)
+        text_height, lines = processor._calculate_text_height(text, font, width, draw)
+        while text_height > available_height and font_size > image_processor.FONT_CONFIG['MIN_FONT_SIZE']:
+            font_size -= 2
+            font = processor._get_cached_font(FONT_PATH, font_size)
+            text_height, lines = processor._calculate_text_height(text, font, width, draw)
+        return font_size, font, text_height, lines
+
+    def test_matches_linear_search(self):
+        """Test the bisected font size is the one the linear search finds"""
+        processor = make_processor()
+        draw = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+        rng = random.Random(0)
+        for _ in range(200):
+            text = random_text(rng)
+            font_size = rng.randint(10, 80)
+            width = rng.randint(200, 1000)
+            available_height = rng.uniform(50, 800)
+            with self.subTest(text=text, font_size=font_size, width=width, available_height=available_height):
+                self.assertEqual(
+                    processor._fit_font_size(text, font_size, width, available_height, draw, FONT_PATH),
+                    self.linear_fit(processor, text, font_size, width, available_height, draw))
+
+class TestCreateTextImage(unittest.TestCase):
+    def setUp(self):
+        image_processor.clear_font_caches()
+
+    def reference_image(self, processor, text):
+        """The image drawn one line at a time with draw_text_line"""
+        config = FONT_CONFIG
+        width, height, font_size = config['width'], config['height'], config['font_size']
+        img = image_processor.load_background_image(config, width, height)
+        draw = ImageDraw.Draw(img)
+        plan = image_processor.plan_layout(width, height, font_size, '', '', FONT_PATH)
+        available_height = plan.end_y - plan.start_y
+        font_size, font, _, lines = processor._fit_font_size(text, font_size, width, available_height, draw, FONT_PATH)
+        line_spacing = font_size * image_processor.FONT_CONFIG['LINE_SPACING_FACTOR']
+        y = plan.start_y + (available_height - len(lines) * line_spacing) / 2
+        for line in lines:
+            if line.strip():
+                processor.draw_text_line(img, draw, line, 0, y, font_size,
+                                         image_processor.FONT_CONFIG['DEFAULT_TEXT_COLOR'], body_font=font)
+            y += line_spacing
+        return img
+
+    def test_text_block_matches_per_line_drawing(self):
+        """Test the single multiline draw gives the same pixels as drawing line by line"""
+        processor = make_processor()
+        rng = random.Random(0)
+        texts = ["Hello world", "Grüße aus München\n\nZweiter Absatz"] + [random_text(rng) for _ in range(4)]
+        for text in texts:
+            with self.subTest(text=text):
+                image = processor.create_text_image(text, show_header_footer=False)
+                self.assertIsNone(ImageChops.difference(image, self.reference_image(processor, text)).getbbox())
+
+if __name__ == '__main__':
+    unittest.main()
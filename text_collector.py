@@ -6,11 +6,6 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 from datetime import datetime
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 class TextCollector:
@@ -5,8 +5,6 @@ import logging
 from typing import Tuple, List, Dict, Any
 from exceptions import TextError
 
-# Configure logging
-logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
 class TextProcessor:
@@ -139,7 +137,7 @@ class TextProcessor:
             if not text.strip():
                 return ""
                 
-            logger.debug(f"Cleaned text: {text[:100]}...")
+            logger.debug("Cleaned text: %.100s...", text)
             return text
             
         except Exception as e:
@@ -203,7 +201,7 @@ class TextProcessor:
                         header_counts[base_section] = 1
                         current_section = base_section
                     
-                    logger.debug(f"Processing section: {current_section}")
+                    logger.debug("Processing section: %s", current_section)
                 else:
                     if current_section and stripped_line:  # Only add non-empty lines
                         current_content.append(stripped_line)
@@ -216,7 +214,8 @@ class TextProcessor:
 
         # Log the found sections
         if sections:
-            logger.debug(f"Found sections: {list(sections.keys())}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Found sections: %s", list(sections))
         else:
             logger.error("No valid sections found in the markdown file")
 
@@ -146,16 +146,16 @@ class HeaderSettingsUI(BaseUI):
         success_count = 0
         fail_count = 0
         
-        for title, text in cleaned_contents.items():
+        # Render all images with current settings
+        images = self.app.image_processor.create_text_images(
+            list(cleaned_contents.values()),
+            [{'header_override': header_override}] * len(cleaned_contents),
+            show_header_footer=show_header
+        )
+        
+        for title, image in zip(cleaned_contents, images):
             logger.debug(f"Processing item: {title}")
             
-            # Create image with current settings
-            image = self.app.image_processor.create_text_image(
-                text,
-                config={'header_override': header_override},
-                show_header_footer=show_header
-            )
-            
             if image is not None:
                 grid_images[title] = image
                 success_count += 1
@@ -248,16 +248,16 @@ class ConfigurationUI(BaseUI):
         success_count = 0
         fail_count = 0
         
-        for title, text in cleaned_contents.items():
+        # Render all images with current settings
+        images = self.app.image_processor.create_text_images(
+            list(cleaned_contents.values()),
+            [{'header_override': header_override}] * len(cleaned_contents),
+            show_header_footer=show_header
+        )
+        
+        for title, image in zip(cleaned_contents, images):
             logger.debug(f"Processing item: {title}")
             
-            # Create image with current settings
-            image = self.app.image_processor.create_text_image(
-                text,
-                config={'header_override': header_override},
-                show_header_footer=show_header
-            )
-            
             if image is not None:
                 grid_images[title] = image
                 success_count += 1
@@ -382,20 +382,21 @@ class FileUploaderUI(BaseUI):
                     grid_images = self.grid_state.get_images()
                     logger.info(f"Existing images: {list(grid_images.keys())}")
                     
+                    # Get settings through state interfaces
+                    header_override = self.header_state.get_header_override()
+                    show_header = self.config_state.get_show_header_footer()
+                    
+                    # Create the new images with current settings
+                    cleaned_contents = processed_file['cleaned_contents']
+                    images = self.app.image_processor.create_text_images(
+                        list(cleaned_contents.values()),
+                        [{'header_override': header_override}] * len(cleaned_contents),
+                        show_header_footer=show_header
+                    )
+                    
                     # Add new images
-                    for title, text in processed_file['cleaned_contents'].items():
-                        logger.info(f"Creating image for: {title}")
-                        # Get settings through state interfaces
-                        header_override = self.header_state.get_header_override()
-                        show_header = self.config_state.get_show_header_footer()
-                        
-                        # Create image with current settings
-                        image = self.app.image_processor.create_text_image(
-                            text,
-                            config={'header_override': header_override},
-                            show_header_footer=show_header
-                        )
-                        logger.info(f"Image created: {image is not None}")
+                    for title, image in zip(cleaned_contents, images):
+                        logger.info(f"Image created for {title}: {image is not None}")
                         if image is not None:
                             grid_images[title] = image
                             logger.info(f"Added image to grid: {title}")